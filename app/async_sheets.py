@@ -0,0 +1,214 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import weakref
+from collections.abc import Sequence
+from urllib.parse import quote
+
+import aiohttp
+
+from app.config import config
+from app.google_sheets import SCOPES, SHEET_NAME
+from app.metrics import SHEETS_CALLS_IN_FLIGHT, SHEETS_REQUEST_SECONDS, SHEETS_RESPONSE_BYTES
+from app.sheets_scheduler import create_scheduler
+from app.storage import InventoryStore, contiguous_row_ranges
+
+logger = logging.getLogger(__name__)
+
+TOKEN_URI = "https://oauth2.googleapis.com/token"
+TOKEN_LIFETIME = 3600
+TOKEN_REFRESH_MARGIN = 300
+TOKEN_EXPIRY_MARGIN = 30
+JWT_BEARER_GRANT = "urn:ietf:params:oauth:grant-type:jwt-bearer"
+
+
+class SheetsApiError(Exception):
+    """Non-2xx answer from the Sheets or OAuth endpoint."""
+
+    def __init__(self, status_code: int, message: str) -> None:
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+
+
+class AsyncSheetsClient(InventoryStore):
+    """Google Sheets v4 REST client on aiohttp, no threads.
+
+    Keeps one pooled keep-alive session per event loop, so the bot polling
+    loop and the uvicorn loop can both use it. The service account access
+    token is shared, refreshed in the background once it is within
+    TOKEN_REFRESH_MARGIN of expiry. aiohttp speaks HTTP/1.1 only.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        service_account_data = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON", "")
+        spreadsheet_id = os.getenv("GOOGLE_SPREADSHEET_ID", "")
+
+        if not service_account_data:
+            raise ValueError("GOOGLE_SERVICE_ACCOUNT_JSON env variable not set")
+        if not spreadsheet_id:
+            raise ValueError("GOOGLE_SPREADSHEET_ID env variable not set")
+
+        self._spreadsheet_id = spreadsheet_id
+        self._service_account_data = service_account_data
+        self._service_account: dict | None = None
+        self._signer = None
+        self._values_url = f"{config.SHEETS_API_URL.rstrip('/')}/spreadsheets/{quote(spreadsheet_id, safe='')}/values"
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+        self._token: str | None = None
+        self._token_expires_at = 0.0
+        self._refresh_tasks: set[asyncio.Task] = set()
+        self._scheduler = create_scheduler()
+
+    @property
+    def spreadsheet_id(self) -> str:
+        return self._spreadsheet_id
+
+    def _session(self) -> aiohttp.ClientSession:
+        """Return pooled keep-alive session for the running event loop."""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=config.SHEETS_HTTP_POOL_SIZE, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=config.SHEETS_HTTP_TIMEOUT)
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def close(self) -> None:
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    def _load_service_account(self) -> dict:
+        if self._service_account is None:
+            try:
+                self._service_account = json.loads(self._service_account_data)
+            except (json.JSONDecodeError, TypeError):
+                with open(self._service_account_data, encoding="utf-8") as file:
+                    self._service_account = json.load(file)
+        return self._service_account
+
+    async def _access_token(self) -> str:
+        """Return cached access token; refresh ahead of expiry without blocking callers."""
+        remaining = self._token_expires_at - time.monotonic()
+        if self._token is not None and remaining > TOKEN_EXPIRY_MARGIN:
+            if remaining < TOKEN_REFRESH_MARGIN:
+                task = asyncio.create_task(self._single_flight.run("token", self._fetch_token))
+                self._refresh_tasks.add(task)
+                task.add_done_callback(self._refresh_done)
+            return self._token
+        return await self._single_flight.run("token", self._fetch_token)
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        self._refresh_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background access token refresh failed: %s", task.exception())
+
+    async def _fetch_token(self) -> str:
+        """Exchange a signed service account JWT for an OAuth access token."""
+        from google.auth import crypt, jwt
+
+        info = self._load_service_account()
+        if self._signer is None:
+            self._signer = crypt.RSASigner.from_service_account_info(info)
+        token_uri = info.get("token_uri", TOKEN_URI)
+        now = int(time.time())
+        assertion = jwt.encode(self._signer, {
+            "iss": info["client_email"],
+            "scope": " ".join(SCOPES),
+            "aud": token_uri,
+            "iat": now,
+            "exp": now + TOKEN_LIFETIME,
+        }).decode()
+
+        async with self._session().post(token_uri, data={"grant_type": JWT_BEARER_GRANT, "assertion": assertion}) as response:
+            body = await response.read()
+            if response.status >= 400:
+                raise SheetsApiError(response.status, "access token request failed")
+        payload = json.loads(body)
+        self._token = payload["access_token"]
+        self._token_expires_at = time.monotonic() + payload.get("expires_in", TOKEN_LIFETIME)
+        return self._token
+
+    async def _request(self, operation: str, method: str, url: str, **kwargs) -> dict:
+        """Send one authorized request. A 401 drops the cached token and is retried once."""
+        for attempt in range(2):
+            token = await self._access_token()
+            headers = {"Authorization": f"Bearer {token}"}
+            SHEETS_CALLS_IN_FLIGHT.inc()
+            started = time.perf_counter()
+            try:
+                async with self._session().request(method, url, headers=headers, **kwargs) as response:
+                    body = await response.read()
+                    status = response.status
+            except aiohttp.ClientConnectionError as e:
+                raise ConnectionError(str(e)) from e
+            finally:
+                SHEETS_CALLS_IN_FLIGHT.dec()
+                SHEETS_REQUEST_SECONDS.observe(time.perf_counter() - started, operation)
+
+            SHEETS_RESPONSE_BYTES.observe(len(body), operation)
+            if status == 401 and attempt == 0:
+                self._token = None
+                continue
+            if status >= 400:
+                raise SheetsApiError(status, body[:200].decode(errors="replace"))
+            return json.loads(body) if body else {}
+
+    async def _call(self, operation: str, method: str, url: str, **kwargs) -> dict:
+        """Run request through the quota scheduler."""
+        kind = "write" if operation == "batchUpdate" else "read"
+        return await self._scheduler.run(
+            operation,
+            kind,
+            lambda: self._request(operation, method, url, **kwargs)
+        )
+
+    async def fetch_rows(self) -> list[list[str]]:
+        """Read the whole ITEMS range."""
+        result = await self._call("get_full", "GET", f"{self._values_url}/{quote(SHEET_NAME, safe='')}")
+        return result.get("values", [])
+
+    async def get_columns(self, columns: Sequence[str]) -> dict[str, list[str]]:
+        """Fetch only given columns of ITEMS via values:batchGet. Returns column letter -> cells by row."""
+        params = [("ranges", f"{SHEET_NAME}!{column}:{column}") for column in columns]
+        params.append(("majorDimension", "COLUMNS"))
+        result = await self._call("batchGet", "GET", f"{self._values_url}:batchGet", params=params)
+        value_ranges = result.get("valueRanges", [])
+
+        projected = {}
+        for column, value_range in zip(columns, value_ranges):
+            values = value_range.get("values", [])
+            projected[column] = values[0] if values else []
+        return projected
+
+    async def get_row_values(self, row_index: int, first_column: str = "A", last_column: str = "X") -> list[str]:
+        """Fetch cells of one known row, e.g. ITEMS!A{n}:X{n}. Trailing empty cells are omitted."""
+        range_notation = f"{SHEET_NAME}!{first_column}{row_index}:{last_column}{row_index}"
+        result = await self._call("get", "GET", f"{self._values_url}/{quote(range_notation, safe='')}")
+        values = result.get("values", [])
+        return values[0] if values else []
+
+    async def write_checkboxes(self, updates: dict[int, bool]) -> None:
+        """Update column T in one values:batchUpdate. Contiguous rows share one range."""
+        data = []
+        for first_row, values in contiguous_row_ranges(updates):
+            last_row = first_row + len(values) - 1
+            range_notation = f"{SHEET_NAME}!T{first_row}"
+            if last_row != first_row:
+                range_notation += f":T{last_row}"
+            data.append({
+                "range": range_notation,
+                "values": [[value] for value in values]
+            })
+
+        await self._call(
+            "batchUpdate",
+            "POST",
+            f"{self._values_url}:batchUpdate",
+            json={"valueInputOption": "USER_ENTERED", "data": data}
+        )
@@ -1,152 +1,134 @@
 import asyncio
-from aiogram import Bot, Dispatcher, Router, types, F
-from aiogram.filters import CommandStart
-from aiogram.types import WebAppInfo, InlineKeyboardButton, InlineKeyboardMarkup
+import html
+import logging
+import math
+import re
+import secrets
+import time
+from collections import OrderedDict
+
+from aiogram import BaseMiddleware, Bot, Dispatcher, Router, types, F
+from aiogram.filters import Command, CommandStart
+from aiogram.types import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+    WebAppInfo
+)
 
 from app.config import config
-from app.google_sheets import get_sheets_client, SHEET_NAME
+from app.journal import request_user
+from app.metrics import BOT_HANDLER_SECONDS
+from app.storage import StoreBusyError, close_store, get_store
+from app.webapp_assets import load_template
+from app.write_queue import get_write_queue
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Observe handling latency per matched handler function."""
+
+    async def __call__(self, handler, event, data):
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            handler_object = data.get("handler")
+            name = handler_object.callback.__name__ if handler_object is not None else "unknown"
+            BOT_HANDLER_SECONDS.observe(time.perf_counter() - started, name)
+
+
+class JournalUserMiddleware(BaseMiddleware):
+    """Expose the Telegram user id to the write journal for the duration of the handler."""
+
+    async def __call__(self, handler, event, data):
+        user = data.get("event_from_user")
+        token = request_user.set(user.id if user is not None else None)
+        try:
+            return await handler(event, data)
+        finally:
+            request_user.reset(token)
+
 
 router = Router()
+router.message.middleware(HandlerMetricsMiddleware())
+router.callback_query.middleware(HandlerMetricsMiddleware())
+router.inline_query.middleware(HandlerMetricsMiddleware())
+router.message.middleware(JournalUserMiddleware())
+router.callback_query.middleware(JournalUserMiddleware())
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_ID_SEPARATORS = re.compile(r"[\r\n,;]+")
+MAX_SUMMARY_LINES = 50
+MESSAGE_TEXT_LIMIT = 4096
+SUMMARY_TEXT_LIMIT = 3500
+MAX_ID_LIST_CHARS = 1000
+MAX_PENDING_BATCHES = 1000
+MAX_CALLBACK_DATA_BYTES = 64
+SEARCH_SUGGESTIONS = 5
+INLINE_RESULTS = 20
+INLINE_CACHE_TIME = 10
+pending_batches: OrderedDict[str, dict[str, int]] = OrderedDict()
 
-WEBAPP_HTML = """
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>QR Scanner</title>
-    <script src="https://telegram.org/js/telegram-web-app.js"></script>
-    <style>
-        * { box-sizing: border-box; margin: 0; padding: 0; }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: var(--tg-theme-bg-color, #1a1a2e);
-            color: var(--tg-theme-text-color, #eaeaea);
-            min-height: 100vh;
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            padding: 20px;
-        }
-        h1 {
-            font-size: 1.5rem;
-            margin-bottom: 20px;
-            color: var(--tg-theme-hint-color, #a0a0a0);
-        }
-        .container {
-            width: 100%;
-            max-width: 400px;
-        }
-        input {
-            width: 100%;
-            padding: 16px;
-            font-size: 1.1rem;
-            border: 2px solid var(--tg-theme-hint-color, #444);
-            border-radius: 12px;
-            background: var(--tg-theme-secondary-bg-color, #16213e);
-            color: var(--tg-theme-text-color, #eaeaea);
-            margin-bottom: 16px;
-            outline: none;
-            transition: border-color 0.2s;
-        }
-        input:focus {
-            border-color: var(--tg-theme-button-color, #0f4c75);
-        }
-        button {
-            width: 100%;
-            padding: 16px;
-            font-size: 1.1rem;
-            font-weight: 600;
-            border: none;
-            border-radius: 12px;
-            background: var(--tg-theme-button-color, #3282b8);
-            color: var(--tg-theme-button-text-color, #fff);
-            cursor: pointer;
-            transition: opacity 0.2s;
-        }
-        button:active { opacity: 0.8; }
-        .status {
-            margin-top: 20px;
-            padding: 12px;
-            border-radius: 8px;
-            text-align: center;
-            display: none;
-        }
-        .status.show { display: block; }
-        .status.success { background: #1b4332; color: #95d5b2; }
-        .status.error { background: #4a1c1c; color: #f8a5a5; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>Warehouse QR Scanner</h1>
-        <input type="text" id="inventoryId" placeholder="Enter inventory_id from QR">
-        <button onclick="sendData()">Submit</button>
-        <div id="status" class="status"></div>
-    </div>
-    <script>
-        const tg = window.Telegram.WebApp;
-        tg.ready();
-        tg.expand();
-
-        function sendData() {
-            const inventoryId = document.getElementById('inventoryId').value.trim();
-            const statusEl = document.getElementById('status');
-            if (!inventoryId) {
-                statusEl.className = 'status show error';
-                statusEl.textContent = 'Please enter inventory_id';
-                return;
-            }
-            tg.sendData(inventoryId);
-            statusEl.className = 'status show success';
-            statusEl.textContent = 'Sent: ' + inventoryId;
-        }
-    </script>
-</body>
-</html>
-"""
+WEBAPP_HTML = load_template("qr_form.html")
 
 
 async def find_row_by_inventory_id(inventory_id: str) -> tuple[int, str, str] | None:
     """Find row index by inventory_id in column K. Returns (1-based index, equipment name from B, storage location from V) or None."""
-    client = get_sheets_client()
-    result = client.get_items_sheet().execute()
-    rows = result.get("values", [])
+    store = get_store()
+    item = await store.lookup_inventory_id(inventory_id)
     
-    for idx, row in enumerate(rows):
-        if len(row) > 10:
-            cell_k = row[10]
-            if str(cell_k).strip() == str(inventory_id).strip():
-                equipment_name = row[1] if len(row) > 1 else "N/A"
-                storage_location = row[21] if len(row) > 21 else "N/A"
-                return (idx + 1, equipment_name, storage_location)
-    return None
+    if item is None:
+        return None
+    
+    equipment_name = item.equipment_name or "N/A"
+    storage_location = item.storage_location or "N/A"
+    return (item.row_index, equipment_name, storage_location)
 
 
-async def update_column_t(row_index: int) -> bool:
+async def update_column_t(row_index: int, inventory_id: str = "") -> bool:
     """Update column T (index 19) to TRUE for given row. Returns success status."""
-    client = get_sheets_client()
-    range_notation = f"{SHEET_NAME}!T{row_index}"
-    
-    body = {"values": [[True]]}
-    
-    client._sheets.values().update(
-        spreadsheetId=client._spreadsheet_id,
-        range=range_notation,
-        valueInputOption="USER_ENTERED",
-        body=body
-    ).execute()
-    
-    return True
+    return await get_write_queue().submit(row_index, True, inventory_id)
+
+
+def busy_message(error: StoreBusyError) -> str:
+    """User-facing reply when the inventory backend sheds a request."""
+    return f"⏳ Google Sheets is busy, please try again in {max(1, math.ceil(error.retry_after))} s"
+
+
+async def not_found_message(inventory_id: str) -> str:
+    """Reply for an unknown inventory_id, with items whose name or location resembles it.
+
+    Suggestions are best effort: they are skipped until an items snapshot is loaded,
+    so a miss never waits on a full sheet read, and a failed search keeps the plain reply.
+    """
+    text = f"❌ Item not found: {html.escape(inventory_id)}"
+    store = get_store()
+    if not store.has_items_snapshot():
+        return text
+    try:
+        items = await store.search_items(inventory_id, SEARCH_SUGGESTIONS)
+    except Exception:
+        logger.warning("Similar items lookup failed", exc_info=True)
+        return text
+    if not items:
+        return text
+    lines = [
+        f"• <b>{html.escape(item.inventory_id)}</b> — "
+        f"{html.escape(item.cell('B') or 'N/A')}, {html.escape(item.cell('V') or 'N/A')}"
+        for item in items
+    ]
+    return text + "\n\n🔎 <b>Similar items:</b>\n" + "\n".join(lines)
 
 
 async def get_item_info(inventory_id: str) -> tuple[bool, str, int | None]:
-    """Get item information by inventory_id. Returns (success, message, row_index)."""
+    """Get item information by inventory_id. Returns (success, HTML message, row_index)."""
     try:
         result = await find_row_by_inventory_id(inventory_id)
         
         if result is None:
-            return False, f"❌ Item not found: {inventory_id}", None
+            return False, await not_found_message(inventory_id), None
         
         row_index, equipment_name, storage_location = result
         
@@ -158,19 +140,122 @@ async def get_item_info(inventory_id: str) -> tuple[bool, str, int | None]:
         )
         return True, message, row_index
     
+    except StoreBusyError as e:
+        return False, busy_message(e), None
     except Exception as e:
-        return False, f"❌ Error processing: {str(e)}", None
+        return False, f"❌ Error processing: {html.escape(str(e))}", None
 
 
-async def mark_label(row_index: int) -> tuple[bool, str]:
-    """Mark label in column T for specified row. Returns (success, message)."""
+async def mark_label(inventory_id: str, row_hint: int) -> tuple[bool, str]:
+    """Mark label in column T for inventory_id, verifying row_hint first. Returns (success, message)."""
     try:
-        await update_column_t(row_index)
+        row_index = await get_store().verify_row(inventory_id, row_hint)
+        if row_index is None:
+            return False, f"❌ Item not found: {inventory_id}"
+        await update_column_t(row_index, inventory_id)
         return True, "✅ Label marked in table"
+    except StoreBusyError as e:
+        return False, busy_message(e)
     except Exception as e:
         return False, f"❌ Error marking: {str(e)}"
 
 
+def parse_inventory_ids(text: str) -> tuple[list[str], int]:
+    """Split scanner input on newlines, commas and semicolons. Returns (unique ids in scan order, duplicates dropped)."""
+    parts = [part.strip() for part in INVENTORY_ID_SEPARATORS.split(text)]
+    parts = [part for part in parts if part]
+    unique = list(dict.fromkeys(parts))
+    return unique, len(parts) - len(unique)
+
+
+def join_ids(inventory_ids: list[str], limit: int) -> str:
+    """Escaped comma-separated inventory_ids within limit characters, with '… and N more' for the rest."""
+    parts = []
+    used = 0
+    for position, inventory_id in enumerate(inventory_ids):
+        part = html.escape(inventory_id)
+        # Unless this is the last id, keep room for the '… and N more' suffix.
+        reserve = 0 if position == len(inventory_ids) - 1 else 24
+        if used + len(part) + 2 + reserve > limit:
+            break
+        parts.append(part)
+        used += len(part) + 2
+    text = ", ".join(parts)
+    rest = len(inventory_ids) - len(parts)
+    if rest:
+        text += f"{', ' if parts else ''}… and {rest} more"
+    return text
+
+
+async def get_items_summary(inventory_ids: list[str], duplicates: int) -> tuple[str, dict[str, int]]:
+    """Resolve many inventory_ids in one index pass. Returns (summary HTML, found inventory_id -> row index).
+
+    The summary is kept under SUMMARY_TEXT_LIMIT characters of HTML, leaving room under
+    Telegram's message limit for the 'Mark all' result appended to it later.
+    """
+    store = get_store()
+    entries = await store.lookup_inventory_ids(inventory_ids)
+    
+    found = []
+    not_found = []
+    rows = {}
+    for inventory_id, entry in zip(inventory_ids, entries):
+        if entry is None:
+            not_found.append(inventory_id)
+            continue
+        rows[inventory_id] = entry.row_index
+        found.append((inventory_id, entry))
+    
+    tail = []
+    if not_found:
+        tail.append(f"\n❌ <b>Not found:</b> {join_ids(not_found, MAX_ID_LIST_CHARS)}")
+    if duplicates:
+        tail.append(f"🔁 <b>Duplicates skipped:</b> {duplicates}")
+    header = f"📦 <b>Found:</b> {len(rows)} of {len(inventory_ids)}"
+    # Room for the header, the tail and an '… and N more' line, each followed by a newline.
+    budget = SUMMARY_TEXT_LIMIT - len(header) - sum(len(line) + 1 for line in tail) - 32
+    
+    lines = []
+    for inventory_id, entry in found[:MAX_SUMMARY_LINES]:
+        mark = "✅" if entry.checkbox_t else "⬜"
+        line = (
+            f"{mark} <b>{html.escape(inventory_id)}</b> — "
+            f"{html.escape(entry.equipment_name or 'N/A')}, "
+            f"{html.escape(entry.storage_location or 'N/A')}"
+        )
+        if len(line) + 1 > budget:
+            break
+        lines.append(line)
+        budget -= len(line) + 1
+    
+    summary = [header]
+    summary.extend(lines)
+    if len(rows) > len(lines):
+        summary.append(f"… and {len(rows) - len(lines)} more")
+    summary.extend(tail)
+    return "\n".join(summary), rows
+
+
+def remember_batch(rows: dict[str, int]) -> str:
+    """Keep inventory_id -> row hints for 'Mark all' button and return callback token. Oldest batches are evicted."""
+    token = secrets.token_urlsafe(8)
+    pending_batches[token] = rows
+    while len(pending_batches) > MAX_PENDING_BATCHES:
+        pending_batches.popitem(last=False)
+    return token
+
+
+def mark_callback_data(inventory_id: str, row_index: int) -> str:
+    """Callback data for 'Mark label': mark:{row hint}:{inventory_id}.
+
+    Ids too long for Telegram's 64-byte limit go through a one-item 'Mark all' batch.
+    """
+    data = f"mark:{row_index}:{inventory_id}"
+    if len(data.encode()) <= MAX_CALLBACK_DATA_BYTES:
+        return data
+    return f"markall:{remember_batch({inventory_id: row_index})}"
+
+
 @router.message(CommandStart())
 async def cmd_start(message: types.Message):
     """Handle /start command."""
@@ -200,40 +285,81 @@ async def cmd_start(message: types.Message):
     )
 
 
+@router.message(Command("stats"))
+async def cmd_stats(message: types.Message):
+    """Handle /stats command: stocktake progress per storage location."""
+    try:
+        stats = await get_store().get_stock_stats()
+    except StoreBusyError as e:
+        await message.answer(busy_message(e))
+        return
+    except Exception as e:
+        await message.answer(f"❌ Error processing: {str(e)}")
+        return
+    
+    lines = [
+        f"📊 <b>Checked:</b> {stats['checked']} of {stats['total']} ({stats['progress']:.0%})",
+        f"⬜ <b>Unchecked:</b> {stats['unchecked']}",
+        ""
+    ]
+    locations = stats["locations"]
+    for location in locations[:MAX_SUMMARY_LINES]:
+        lines.append(
+            f"📍 {html.escape(location['location'] or 'N/A')}: "
+            f"{location['checked']}/{location['total']}"
+        )
+    if len(locations) > MAX_SUMMARY_LINES:
+        lines.append(f"… and {len(locations) - MAX_SUMMARY_LINES} more locations")
+    
+    await message.answer("\n".join(lines), parse_mode="HTML")
+
+
 @router.message(F.text & ~F.text.startswith('/'))
 async def handle_message(message: types.Message):
     """Handle text messages as QR code data (inventory_id)."""
     if not message.text:
         return
     
-    inventory_id = message.text.strip()
+    inventory_ids, duplicates = parse_inventory_ids(message.text)
     
-    if not inventory_id:
+    if not inventory_ids:
         await message.answer("❌ Empty message")
         return
     
+    if len(inventory_ids) > 1:
+        await handle_batch_message(message, inventory_ids, duplicates)
+        return
+    
+    inventory_id = inventory_ids[0]
+    
     await message.answer(f"🔍 Searching for: {inventory_id}...")
     
     success, info_message, row_index = await get_item_info(inventory_id)
     
     if not success:
-        await message.answer(info_message)
+        await message.answer(info_message, parse_mode="HTML")
         return
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="✅ Mark label", callback_data=f"mark_{row_index}")]
+        [InlineKeyboardButton(text="✅ Mark label", callback_data=mark_callback_data(inventory_id, row_index))]
     ])
     
     await message.answer(info_message, parse_mode="HTML", reply_markup=keyboard)
 
 
 @router.callback_query(F.data.startswith("mark_"))
+async def handle_legacy_mark_callback(callback: types.CallbackQuery):
+    """Refuse buttons that carry only a row number: the row may hold another item by now."""
+    await callback.answer("❌ This button has expired, send the code again", show_alert=True)
+
+
+@router.callback_query(F.data.startswith("mark:"))
 async def handle_mark_callback(callback: types.CallbackQuery):
     """Handle 'Mark label' button click."""
     try:
-        row_index = int(callback.data.split("_")[1])
+        _, row_hint, inventory_id = callback.data.split(":", 2)
         
-        success, result_message = await mark_label(row_index)
+        success, result_message = await mark_label(inventory_id, int(row_hint))
         
         if success:
             await callback.answer("✅ Label marked!")
@@ -248,6 +374,87 @@ async def handle_mark_callback(callback: types.CallbackQuery):
         await callback.answer(f"❌ Error: {str(e)}", show_alert=True)
 
 
+async def handle_batch_message(message: types.Message, inventory_ids: list[str], duplicates: int):
+    """Reply to a multi-code scan with one summary card and one 'Mark all' button."""
+    try:
+        summary, rows = await get_items_summary(inventory_ids, duplicates)
+    except StoreBusyError as e:
+        await message.answer(busy_message(e))
+        return
+    except Exception as e:
+        await message.answer(f"❌ Error processing: {str(e)}")
+        return
+    
+    keyboard = None
+    if rows:
+        token = remember_batch(rows)
+        keyboard = InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text=f"✅ Mark all ({len(rows)})", callback_data=f"markall:{token}")]
+        ])
+    
+    await message.answer(summary, parse_mode="HTML", reply_markup=keyboard)
+
+
+@router.callback_query(F.data.startswith("markall:"))
+async def handle_mark_all_callback(callback: types.CallbackQuery):
+    """Handle 'Mark all' button click with one batched column T write."""
+    token = callback.data.split(":", 1)[1]
+    rows = pending_batches.pop(token, None)
+    
+    if rows is None:
+        await callback.answer("❌ This list has expired, send the codes again", show_alert=True)
+        return
+    
+    try:
+        store = get_store()
+        verified = await store.verify_rows(rows)
+        found = {row_index: inventory_id for inventory_id, row_index in verified.items() if row_index is not None}
+        updates = {row_index: True for row_index in found}
+        await store.batch_update_checkboxes(updates, found)
+    except StoreBusyError as e:
+        pending_batches[token] = rows
+        await callback.answer(busy_message(e), show_alert=True)
+        return
+    except Exception as e:
+        pending_batches[token] = rows
+        await callback.answer(f"❌ Error marking: {str(e)}", show_alert=True)
+        return
+    
+    missing = [inventory_id for inventory_id, row_index in verified.items() if row_index is None]
+    result = f"✅ {len(updates)} labels marked in table"
+    if missing:
+        label = "\n❌ <b>No longer in table:</b> "
+        room = MESSAGE_TEXT_LIMIT - len(callback.message.html_text) - len(result) - len(label) - 2
+        result += label + join_ids(missing, min(room, MAX_ID_LIST_CHARS))
+    
+    await callback.answer(f"✅ {len(updates)} labels marked!")
+    await callback.message.edit_text(
+        callback.message.html_text + f"\n\n{result}",
+        parse_mode="HTML"
+    )
+
+
+@router.inline_query()
+async def handle_inline_query(inline_query: types.InlineQuery):
+    """Autocomplete inventory_id by prefix for '@bot ABC12'; choosing a result sends the ID to the chat."""
+    try:
+        items = await get_store().complete_inventory_ids(inline_query.query, INLINE_RESULTS)
+    except Exception:
+        await inline_query.answer([], cache_time=0, is_personal=True)
+        return
+    
+    results = [
+        InlineQueryResultArticle(
+            id=str(item.row_index),
+            title=f"{'✅' if item.checkbox_t else '⬜'} {item.inventory_id}",
+            description=f"{item.cell('B') or 'N/A'}, {item.cell('V') or 'N/A'}",
+            input_message_content=InputTextMessageContent(message_text=item.inventory_id)
+        )
+        for item in items
+    ]
+    await inline_query.answer(results, cache_time=INLINE_CACHE_TIME)
+
+
 bot: Bot | None = None
 dp: Dispatcher | None = None
 
@@ -275,7 +482,10 @@ async def start_polling():
     """Start bot in polling mode (for development)."""
     bot_instance = get_bot()
     dispatcher = get_dispatcher()
-    await dispatcher.start_polling(bot_instance)
+    try:
+        await dispatcher.start_polling(bot_instance)
+    finally:
+        await close_store()
 
 
 async def process_webhook_update(update_data: dict):
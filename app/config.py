@@ -12,21 +12,52 @@ class Config:
     RAILWAY_ENV: str = os.getenv("RAILWAY_ENV", "development")
     RAILWAY_PUBLIC_DOMAIN: str = os.getenv("RAILWAY_PUBLIC_DOMAIN", "")
     RAILWAY_STATIC_URL: str = os.getenv("RAILWAY_STATIC_URL", "")
+    INVENTORY_BACKEND: str = os.getenv("INVENTORY_BACKEND", "sheets")
+    SQLITE_STORE_PATH: str = os.getenv("SQLITE_STORE_PATH", "inventory.sqlite3")
+    MEMORY_STORE_ROWS: int = int(os.getenv("MEMORY_STORE_ROWS", "1000"))
+    MEMORY_STORE_LATENCY: float = float(os.getenv("MEMORY_STORE_LATENCY", "0"))
+    MEMORY_STORE_ERROR_RATE: float = float(os.getenv("MEMORY_STORE_ERROR_RATE", "0"))
+    ITEMS_CACHE_TTL: float = float(os.getenv("ITEMS_CACHE_TTL", "60"))
+    ITEMS_FULL_RELOAD_INTERVAL: float = float(os.getenv("ITEMS_FULL_RELOAD_INTERVAL", "600"))
+    ITEMS_SNAPSHOT_PATH: str = os.getenv("ITEMS_SNAPSHOT_PATH", "items_snapshot.jsonl")
+    ITEMS_SNAPSHOT_SAVE_INTERVAL: float = float(os.getenv("ITEMS_SNAPSHOT_SAVE_INTERVAL", "60"))
+    SHEETS_EXECUTOR_WORKERS: int = int(os.getenv("SHEETS_EXECUTOR_WORKERS", "4"))
+    SHEETS_API_URL: str = os.getenv("SHEETS_API_URL", "https://sheets.googleapis.com/v4")
+    SHEETS_HTTP_POOL_SIZE: int = int(os.getenv("SHEETS_HTTP_POOL_SIZE", "10"))
+    SHEETS_HTTP_TIMEOUT: float = float(os.getenv("SHEETS_HTTP_TIMEOUT", "30"))
+    SHEETS_READS_PER_MINUTE: float = float(os.getenv("SHEETS_READS_PER_MINUTE", "60"))
+    SHEETS_WRITES_PER_MINUTE: float = float(os.getenv("SHEETS_WRITES_PER_MINUTE", "60"))
+    SHEETS_INTERACTIVE_RESERVE: float = float(os.getenv("SHEETS_INTERACTIVE_RESERVE", "0.25"))
+    SHEETS_MAX_WAIT: float = float(os.getenv("SHEETS_MAX_WAIT", "2"))
+    SHEETS_MAX_RETRIES: int = int(os.getenv("SHEETS_MAX_RETRIES", "4"))
+    SHEETS_BACKOFF_BASE: float = float(os.getenv("SHEETS_BACKOFF_BASE", "0.5"))
+    SHEETS_BACKOFF_MAX: float = float(os.getenv("SHEETS_BACKOFF_MAX", "16"))
+    WRITE_JOURNAL_PATH: str = os.getenv("WRITE_JOURNAL_PATH", "write_journal.jsonl")
+    JOURNAL_REPLAY_INTERVAL: float = float(os.getenv("JOURNAL_REPLAY_INTERVAL", "60"))
+    JOURNAL_COMPACT_RECORDS: int = int(os.getenv("JOURNAL_COMPACT_RECORDS", "10000"))
+    WRITE_BATCH_WINDOW: float = float(os.getenv("WRITE_BATCH_WINDOW", "0.2"))
+    TELEGRAM_WEBHOOK_SECRET: str = os.getenv("TELEGRAM_WEBHOOK_SECRET", "")
+    WEBHOOK_WORKERS: int = int(os.getenv("WEBHOOK_WORKERS", "8"))
+    WEBHOOK_QUEUE_SIZE: int = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
 
     @classmethod
     def is_production(cls) -> bool:
         return cls.RAILWAY_ENV == "production"
     
     @classmethod
-    def get_webapp_url(cls) -> str | None:
-        """Get webapp URL based on environment. Always returns HTTPS for production. Returns None if not configured."""
+    def is_webhook_mode(cls) -> bool:
+        return bool(cls.TELEGRAM_WEBHOOK_SECRET)
+    
+    @classmethod
+    def get_public_base_url(cls) -> str | None:
+        """Get public HTTPS base URL of the app. Returns None if not configured."""
         # Check if we have Railway domain (production)
         if cls.RAILWAY_PUBLIC_DOMAIN:
             # Ensure HTTPS
             domain = cls.RAILWAY_PUBLIC_DOMAIN
             if not domain.startswith('http'):
                 domain = f"https://{domain}"
-            return f"{domain}/webapp"
+            return domain
         
         if cls.RAILWAY_STATIC_URL:
             # Ensure HTTPS
@@ -35,10 +66,26 @@ class Config:
                 url = url.replace('http://', 'https://')
             elif not url.startswith('http'):
                 url = f"https://{url}"
-            return f"{url}/webapp"
+            return url
         
-        # No URL configured - return None (bot will work without WebApp button)
         return None
+    
+    @classmethod
+    def get_webapp_url(cls) -> str | None:
+        """Get webapp URL based on environment. Always returns HTTPS for production. Returns None if not configured."""
+        base_url = cls.get_public_base_url()
+        # No URL configured - return None (bot will work without WebApp button)
+        if base_url is None:
+            return None
+        return f"{base_url}/webapp"
+    
+    @classmethod
+    def get_webhook_url(cls) -> str | None:
+        """Get Telegram webhook URL. Returns None if webhook mode or public URL is not configured."""
+        base_url = cls.get_public_base_url()
+        if base_url is None or not cls.is_webhook_mode():
+            return None
+        return f"{base_url}/telegram/webhook/{cls.TELEGRAM_WEBHOOK_SECRET}"
 
 
 config = Config()
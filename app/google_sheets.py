@@ -1,17 +1,31 @@
 import os
 import json
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+import asyncio
+import functools
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import config
+from app.metrics import SHEETS_CALLS_IN_FLIGHT, SHEETS_REQUEST_SECONDS, SHEETS_RESPONSE_BYTES
+from app.sheets_scheduler import create_scheduler
+from app.storage import InventoryStore, contiguous_row_ranges
 
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 SHEET_NAME = "ITEMS"
 
 
-class GoogleSheetsClient:
-    """Google Sheets client for accessing ITEMS sheet only."""
+class GoogleSheetsClient(InventoryStore):
+    """Google Sheets client for accessing ITEMS sheet only.
+
+    Credentials and the API service are created on first call, in the Sheets
+    executor, so constructing the client does not import googleapiclient.
+    """
 
     def __init__(self) -> None:
         """Initialize client using service account from env variable."""
+        super().__init__()
         service_account_data = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON", "")
         spreadsheet_id = os.getenv("GOOGLE_SPREADSHEET_ID", "")
 
@@ -21,93 +35,140 @@ class GoogleSheetsClient:
             raise ValueError("GOOGLE_SPREADSHEET_ID env variable not set")
 
         self._spreadsheet_id = spreadsheet_id
-        
+        self._service_account_data = service_account_data
+        self._credentials = None
+        self._sheets = None
+        self._build_lock = threading.Lock()
+        self._local = threading.local()
+        self._scheduler = create_scheduler()
+
+    @property
+    def spreadsheet_id(self) -> str:
+        return self._spreadsheet_id
+
+    def _spreadsheets(self):
+        """Return spreadsheets() resource, building the service on first use.
+
+        Uses the discovery document bundled with google-api-python-client, no network fetch.
+        """
+        if self._sheets is None:
+            with self._build_lock:
+                if self._sheets is None:
+                    from google.oauth2.service_account import Credentials
+                    from googleapiclient.discovery import build
+
+                    try:
+                        service_account_json = json.loads(self._service_account_data)
+                        self._credentials = Credentials.from_service_account_info(
+                            service_account_json, scopes=SCOPES
+                        )
+                    except (json.JSONDecodeError, TypeError):
+                        self._credentials = Credentials.from_service_account_file(
+                            self._service_account_data, scopes=SCOPES
+                        )
+
+                    service = build(
+                        "sheets", "v4",
+                        credentials=self._credentials,
+                        static_discovery=True,
+                        cache_discovery=False
+                    )
+                    self._sheets = service.spreadsheets()
+        return self._sheets
+
+    def _http(self):
+        """Return per-thread authorized transport, httplib2 is not thread-safe."""
+        http = getattr(self._local, "http", None)
+        if http is None:
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+
+            http = AuthorizedHttp(self._credentials, http=httplib2.Http())
+            self._local.http = http
+        return http
+
+    def _execute(self, operation: str, make_request) -> dict:
+        """Build and execute request in the calling thread, recording its latency and response size."""
+        request = make_request()
+        postproc = request.postproc
+
+        def measure(response, content):
+            SHEETS_RESPONSE_BYTES.observe(len(content), operation)
+            return postproc(response, content)
+
+        request.postproc = measure
+        started = time.perf_counter()
         try:
-            service_account_json = json.loads(service_account_data)
-            self._credentials = Credentials.from_service_account_info(
-                service_account_json, scopes=SCOPES
-            )
-        except (json.JSONDecodeError, TypeError):
-            self._credentials = Credentials.from_service_account_file(
-                service_account_data, scopes=SCOPES
-            )
-        
-        self._service = build("sheets", "v4", credentials=self._credentials)
-        self._sheets = self._service.spreadsheets()
+            return request.execute(http=self._http())
+        finally:
+            SHEETS_REQUEST_SECONDS.observe(time.perf_counter() - started, operation)
+
+    async def _call(self, operation: str, make_request) -> dict:
+        """Run request built by make_request() through the quota scheduler and the Sheets executor."""
+        kind = "write" if operation == "batchUpdate" else "read"
+        return await self._scheduler.run(
+            operation,
+            kind,
+            lambda: run_sheets_call(self._execute, operation, make_request)
+        )
 
     def get_items_sheet(self):
         """Return reference to ITEMS sheet for read operations."""
-        return self._sheets.values().get(
+        return self._spreadsheets().values().get(
             spreadsheetId=self._spreadsheet_id,
             range=SHEET_NAME
         )
 
-    def get_all_items(self) -> list[dict]:
-        """Get all rows from ITEMS sheet. Returns list of dicts with row data."""
-        result = self.get_items_sheet().execute()
-        rows = result.get("values", [])
-        
-        items = []
-        for idx, row in enumerate(rows):
-            if len(row) > 10:
-                item = {
-                    "row_index": idx + 1,
-                    "inventory_id": row[10] if len(row) > 10 else "",
-                    "checkbox_t": row[19].upper() == "TRUE" if len(row) > 19 and row[19] else False,
-                    "data": {
-                        "A": row[0] if len(row) > 0 else "",
-                        "B": row[1] if len(row) > 1 else "",
-                        "C": row[2] if len(row) > 2 else "",
-                        "D": row[3] if len(row) > 3 else "",
-                        "E": row[4] if len(row) > 4 else "",
-                        "F": row[5] if len(row) > 5 else "",
-                        "G": row[6] if len(row) > 6 else "",
-                        "H": row[7] if len(row) > 7 else "",
-                        "I": row[8] if len(row) > 8 else "",
-                        "J": row[9] if len(row) > 9 else "",
-                        "K": row[10] if len(row) > 10 else "",
-                        "L": row[11] if len(row) > 11 else "",
-                        "M": row[12] if len(row) > 12 else "",
-                        "N": row[13] if len(row) > 13 else "",
-                        "O": row[14] if len(row) > 14 else "",
-                        "P": row[15] if len(row) > 15 else "",
-                        "Q": row[16] if len(row) > 16 else "",
-                        "R": row[17] if len(row) > 17 else "",
-                        "S": row[18] if len(row) > 18 else "",
-                        "T": row[19] if len(row) > 19 else "",
-                        "U": row[20] if len(row) > 20 else "",
-                        "V": row[21] if len(row) > 21 else "",
-                        "W": row[22] if len(row) > 22 else "",
-                        "X": row[23] if len(row) > 23 else "",
-                    }
-                }
-                items.append(item)
-        return items
-
-    def find_item_by_inventory_id(self, inventory_id: str) -> dict | None:
-        """Find item by inventory_id in column K. Returns item dict or None."""
-        items = self.get_all_items()
-        for item in items:
-            if str(item["inventory_id"]).strip() == str(inventory_id).strip():
-                return item
-        return None
-
-    def update_checkbox(self, row_index: int, value: bool) -> bool:
-        """Update column T (checkbox) for given row. Returns success status."""
-        range_notation = f"{SHEET_NAME}!T{row_index}"
-        body = {"values": [[value]]}
-        
-        self._sheets.values().update(
+    async def fetch_rows(self) -> list[list[str]]:
+        """Read the whole ITEMS range."""
+        result = await self._call("get_full", self.get_items_sheet)
+        return result.get("values", [])
+
+    async def get_columns(self, columns: Sequence[str]) -> dict[str, list[str]]:
+        """Fetch only given columns of ITEMS via values.batchGet. Returns column letter -> cells by row."""
+        result = await self._call("batchGet", lambda: self._spreadsheets().values().batchGet(
+            spreadsheetId=self._spreadsheet_id,
+            ranges=[f"{SHEET_NAME}!{column}:{column}" for column in columns],
+            majorDimension="COLUMNS"
+        ))
+        value_ranges = result.get("valueRanges", [])
+
+        projected = {}
+        for column, value_range in zip(columns, value_ranges):
+            values = value_range.get("values", [])
+            projected[column] = values[0] if values else []
+        return projected
+
+    async def get_row_values(self, row_index: int, first_column: str = "A", last_column: str = "X") -> list[str]:
+        """Fetch cells of one known row, e.g. ITEMS!A{n}:X{n}. Trailing empty cells are omitted."""
+        result = await self._call("get", lambda: self._spreadsheets().values().get(
+            spreadsheetId=self._spreadsheet_id,
+            range=f"{SHEET_NAME}!{first_column}{row_index}:{last_column}{row_index}"
+        ))
+        values = result.get("values", [])
+        return values[0] if values else []
+
+    async def write_checkboxes(self, updates: dict[int, bool]) -> None:
+        """Update column T in one values.batchUpdate. Contiguous rows share one range."""
+        data = []
+        for first_row, values in contiguous_row_ranges(updates):
+            last_row = first_row + len(values) - 1
+            range_notation = f"{SHEET_NAME}!T{first_row}"
+            if last_row != first_row:
+                range_notation += f":T{last_row}"
+            data.append({
+                "range": range_notation,
+                "values": [[value] for value in values]
+            })
+
+        await self._call("batchUpdate", lambda: self._spreadsheets().values().batchUpdate(
             spreadsheetId=self._spreadsheet_id,
-            range=range_notation,
-            valueInputOption="USER_ENTERED",
-            body=body
-        ).execute()
-        
-        return True
+            body={"valueInputOption": "USER_ENTERED", "data": data}
+        ))
 
 
 sheets_client: GoogleSheetsClient | None = None
+sheets_executor: ThreadPoolExecutor | None = None
 
 
 def get_sheets_client() -> GoogleSheetsClient:
@@ -116,3 +177,27 @@ def get_sheets_client() -> GoogleSheetsClient:
     if sheets_client is None:
         sheets_client = GoogleSheetsClient()
     return sheets_client
+
+
+def get_sheets_executor() -> ThreadPoolExecutor:
+    """Get or create bounded thread pool dedicated to blocking Sheets I/O."""
+    global sheets_executor
+    if sheets_executor is None:
+        sheets_executor = ThreadPoolExecutor(
+            max_workers=config.SHEETS_EXECUTOR_WORKERS,
+            thread_name_prefix="sheets"
+        )
+    return sheets_executor
+
+
+async def run_sheets_call(func, *args, **kwargs):
+    """Run blocking Sheets call in the Sheets executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    SHEETS_CALLS_IN_FLIGHT.inc()
+    try:
+        return await loop.run_in_executor(
+            get_sheets_executor(),
+            functools.partial(func, *args, **kwargs)
+        )
+    finally:
+        SHEETS_CALLS_IN_FLIGHT.dec()
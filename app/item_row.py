@@ -0,0 +1,70 @@
+COLUMN_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWX"
+INVENTORY_ID_COLUMN = 10
+CHECKBOX_COLUMN = 19
+ITEM_FIELDS = ("row_index", "inventory_id", "checkbox_t", *COLUMN_LETTERS)
+
+
+class ItemRow:
+    """Compact ITEMS row: 1-based row index and raw cells. Dict is built only at API boundary."""
+
+    __slots__ = ("row_index", "cells")
+
+    def __init__(self, row_index: int, cells: tuple[str, ...]) -> None:
+        self.row_index = row_index
+        self.cells = cells
+
+    def cell(self, column: str) -> str:
+        """Return cell value for column letter, empty string if row is shorter."""
+        position = COLUMN_LETTERS.index(column)
+        return self.cells[position] if position < len(self.cells) else ""
+
+    @property
+    def inventory_id(self) -> str:
+        return self.cells[INVENTORY_ID_COLUMN] if len(self.cells) > INVENTORY_ID_COLUMN else ""
+
+    @property
+    def checkbox_t(self) -> bool:
+        cells = self.cells
+        return len(cells) > CHECKBOX_COLUMN and str(cells[CHECKBOX_COLUMN]).upper() == "TRUE"
+
+    def to_dict(self, fields: tuple[str, ...] | None = None) -> dict:
+        """Return item in API shape: row_index, inventory_id, checkbox_t and A..X data.
+
+        With fields, only listed keys are included; column letters go under "data".
+        """
+        if fields is not None:
+            return self._project(fields)
+        cells = self.cells
+        size = len(cells)
+        return {
+            "row_index": self.row_index,
+            "inventory_id": self.inventory_id,
+            "checkbox_t": self.checkbox_t,
+            "data": {
+                column: cells[position] if position < size else ""
+                for position, column in enumerate(COLUMN_LETTERS)
+            }
+        }
+
+    def _project(self, fields: tuple[str, ...]) -> dict:
+        item: dict = {}
+        data: dict[str, str] = {}
+        for field in fields:
+            if field in COLUMN_LETTERS:
+                data[field] = self.cell(field)
+            else:
+                item[field] = getattr(self, field)
+        if data:
+            item["data"] = data
+        return item
+
+
+def parse_fields(fields: str | None) -> tuple[str, ...] | None:
+    """Parse comma-separated field projection. Raises ValueError on unknown field."""
+    if not fields:
+        return None
+    parsed = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    for field in parsed:
+        if field not in ITEM_FIELDS:
+            raise ValueError(f"unknown field: {field}")
+    return parsed or None
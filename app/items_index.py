@@ -0,0 +1,134 @@
+import time
+import threading
+
+
+def normalize_inventory_id(value) -> str:
+    """Normalize inventory_id the same way for index keys and lookups."""
+    return str(value).strip()
+
+
+class IndexEntry:
+    """Indexed K/B/V/T values of one ITEMS row."""
+
+    __slots__ = ("row_index", "inventory_id", "equipment_name", "storage_location", "checkbox_t")
+
+    def __init__(
+        self,
+        row_index: int,
+        inventory_id: str,
+        equipment_name: str,
+        storage_location: str,
+        checkbox_t: bool
+    ) -> None:
+        self.row_index = row_index
+        self.inventory_id = inventory_id
+        self.equipment_name = equipment_name
+        self.storage_location = storage_location
+        self.checkbox_t = checkbox_t
+
+
+class ItemsIndex:
+    """In-memory hash index of ITEMS rows keyed by normalized inventory_id (column K).
+
+    Indexed columns are kept column-oriented: position p holds sheet row p + 1.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self._ttl = ttl
+        self._ids: list[str] = []
+        self._names: list[str] = []
+        self._locations: list[str] = []
+        self._checked: list[bool] = []
+        self._positions: dict[str, int] = {}
+        self._loaded_at: float | None = None
+        self._full_loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def is_fresh(self) -> bool:
+        """Return True if index is loaded and younger than TTL."""
+        loaded_at = self._loaded_at
+        return loaded_at is not None and time.monotonic() - loaded_at < self._ttl
+
+    def full_load_age(self) -> float | None:
+        """Seconds since the last full K/B/V/T load from the backend, None if there was none."""
+        full_loaded_at = self._full_loaded_at
+        return None if full_loaded_at is None else time.monotonic() - full_loaded_at
+
+    def load(self, columns: dict[str, list[str]], verified: bool = True) -> None:
+        """Replace index contents from projected K, B, V, T columns. First row wins for duplicate inventory_id.
+
+        verified=False marks data that did not come from the backend, so the next refresh is a full load.
+        """
+        ids = columns["K"]
+        size = len(ids)
+        names = _pad(columns["B"], size)
+        locations = _pad(columns["V"], size)
+        checked = [str(value).upper() == "TRUE" for value in _pad(columns["T"], size)]
+
+        positions: dict[str, int] = {}
+        for position, inventory_id in enumerate(ids):
+            key = normalize_inventory_id(inventory_id)
+            if key and key not in positions:
+                positions[key] = position
+
+        with self._lock:
+            self._ids = ids
+            self._names = names
+            self._locations = locations
+            self._checked = checked
+            self._positions = positions
+            self._loaded_at = time.monotonic()
+            self._full_loaded_at = self._loaded_at if verified else None
+
+    def apply_fingerprint(self, ids: list[str], checks: list[str]) -> bool:
+        """Take column T from fetched K/T columns if column K is unchanged and mark index fresh.
+
+        Returns False if inventory_ids changed and a full load is needed.
+        """
+        with self._lock:
+            if self._loaded_at is None or ids != self._ids:
+                return False
+            self._checked = [str(value).upper() == "TRUE" for value in _pad(checks, len(ids))]
+            self._loaded_at = time.monotonic()
+            return True
+
+    def get(self, inventory_id: str) -> IndexEntry | None:
+        """Return indexed entry for inventory_id or None."""
+        with self._lock:
+            position = self._positions.get(normalize_inventory_id(inventory_id))
+            if position is None:
+                return None
+            return IndexEntry(
+                row_index=position + 1,
+                inventory_id=self._ids[position],
+                equipment_name=self._names[position],
+                storage_location=self._locations[position],
+                checkbox_t=self._checked[position]
+            )
+
+    def set_checkbox(self, row_index: int, value: bool) -> bool:
+        """Apply a column T write to the cached row. Returns False if row is not cached."""
+        with self._lock:
+            position = row_index - 1
+            if not 0 <= position < len(self._checked):
+                return False
+            self._checked[position] = value
+            return True
+
+    def invalidate(self) -> None:
+        """Drop cached rows so the next lookup reloads them from the sheet."""
+        with self._lock:
+            self._ids = []
+            self._names = []
+            self._locations = []
+            self._checked = []
+            self._positions = {}
+            self._loaded_at = None
+            self._full_loaded_at = None
+
+
+def _pad(values: list[str], size: int) -> list[str]:
+    """Pad column to size, Sheets API omits trailing empty cells."""
+    if len(values) >= size:
+        return values[:size]
+    return values + [""] * (size - len(values))
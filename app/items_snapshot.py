@@ -0,0 +1,145 @@
+import bisect
+import hashlib
+import secrets
+import time
+
+from app.item_row import CHECKBOX_COLUMN, ItemRow
+from app.items_index import normalize_inventory_id
+
+# Snapshot versions restart in every process, so version ETags also carry this per-process epoch.
+ETAG_EPOCH = secrets.token_hex(4)
+
+
+class ItemsSnapshot:
+    """Immutable cached copy of ITEMS rows with a monotonically increasing version."""
+
+    __slots__ = ("version", "items", "digest", "loaded_at", "full_loaded_at", "source_items", "_by_id")
+
+    def __init__(
+        self,
+        version: int,
+        items: list[ItemRow],
+        digest: str,
+        loaded_at: float | None = None,
+        full_loaded_at: float | None = None,
+        source_items: list[ItemRow] | None = None
+    ) -> None:
+        self.version = version
+        self.items = items
+        self.digest = digest
+        self.loaded_at = time.monotonic() if loaded_at is None else loaded_at
+        self.full_loaded_at = self.loaded_at if full_loaded_at is None else full_loaded_at
+        # Rows as last read in full; column T patches keep it, so derived B..V data stays valid.
+        self.source_items = items if source_items is None else source_items
+        self._by_id: dict[str, ItemRow] | None = None
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.monotonic() - self.loaded_at < ttl
+
+    def full_load_age(self) -> float:
+        """Seconds since rows were last read in full; K/T checks in between do not count."""
+        return time.monotonic() - self.full_loaded_at
+
+    def expire(self) -> None:
+        """Mark snapshot stale and due for a full reload; version is kept so an identical reload does not change ETags."""
+        self.loaded_at = float("-inf")
+        self.full_loaded_at = float("-inf")
+
+    def find(self, inventory_id: str) -> ItemRow | None:
+        """Return row for inventory_id. First row wins for duplicates."""
+        by_id = self._by_id
+        if by_id is None:
+            by_id = {}
+            for item in self.items:
+                key = normalize_inventory_id(item.inventory_id)
+                if key and key not in by_id:
+                    by_id[key] = item
+            self._by_id = by_id
+        return by_id.get(normalize_inventory_id(inventory_id))
+
+    def item_at(self, row_index: int) -> ItemRow | None:
+        """Return item of sheet row row_index or None."""
+        position = bisect.bisect_left(self.items, row_index, key=lambda item: item.row_index)
+        if position < len(self.items) and self.items[position].row_index == row_index:
+            return self.items[position]
+        return None
+
+    def checkbox_changes(self, ids: list[str], checks: list[str]) -> dict[int, bool] | None:
+        """Compare fetched K and T columns with the snapshot.
+
+        Returns column T values that differ, by row, or None if any inventory_id
+        was added, removed or moved and the snapshot has to be reloaded.
+        """
+        by_row = {item.row_index: item for item in self.items if item.inventory_id}
+        matched = 0
+        for position, inventory_id in enumerate(ids):
+            if not inventory_id:
+                continue
+            item = by_row.get(position + 1)
+            if item is None or item.inventory_id != inventory_id:
+                return None
+            matched += 1
+        if matched != len(by_row):
+            return None
+
+        changes = {}
+        for row_index, item in by_row.items():
+            position = row_index - 1
+            value = position < len(checks) and str(checks[position]).upper() == "TRUE"
+            if value != item.checkbox_t:
+                changes[row_index] = value
+        return changes
+
+    def with_checkboxes(self, version: int, updates: dict[int, bool]) -> "ItemsSnapshot":
+        """Return copy with column T values applied, keeping load time.
+
+        Only patched rows are touched; a built inventory_id map is carried over
+        with those rows re-pointed, so find() stays O(1) across writes.
+        Digest is cleared, so the next reload always gets a new version.
+        """
+        items = list(self.items)
+        by_id = None if self._by_id is None else dict(self._by_id)
+        for row_index, value in updates.items():
+            position = bisect.bisect_left(items, row_index, key=lambda item: item.row_index)
+            if position == len(items) or items[position].row_index != row_index:
+                continue
+            old_item = items[position]
+            items[position] = _with_checkbox(old_item, value)
+            if by_id is not None:
+                key = normalize_inventory_id(old_item.inventory_id)
+                if by_id.get(key) is old_item:
+                    by_id[key] = items[position]
+        snapshot = ItemsSnapshot(version, items, "", self.loaded_at, self.full_loaded_at, self.source_items)
+        snapshot._by_id = by_id
+        return snapshot
+
+
+def rows_digest(items: list[ItemRow]) -> str:
+    """Content hash of rows, used to keep version unchanged when a reload returns identical data."""
+    digest = hashlib.blake2b(digest_size=16)
+    for item in items:
+        digest.update(f"{item.row_index}\x1e".encode())
+        digest.update("\x1f".join(map(str, item.cells)).encode())
+        digest.update(b"\x1d")
+    return digest.hexdigest()
+
+
+def version_etag(kind: str, version: int, variant: str = "") -> str:
+    """Strong ETag of a snapshot version, unique across processes."""
+    return f'"{kind}-{ETAG_EPOCH}-{version}{variant}"'
+
+
+def item_etag(item: ItemRow) -> str:
+    """Strong ETag of a single row's content."""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(f"{item.row_index}\x1e".encode())
+    digest.update("\x1f".join(map(str, item.cells)).encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def _with_checkbox(item: ItemRow, value: bool) -> ItemRow:
+    cells = list(item.cells)
+    if len(cells) <= CHECKBOX_COLUMN:
+        cells.extend([""] * (CHECKBOX_COLUMN + 1 - len(cells)))
+    cells[CHECKBOX_COLUMN] = "TRUE" if value else "FALSE"
+    return ItemRow(item.row_index, tuple(cells))
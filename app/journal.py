@@ -0,0 +1,252 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+
+from app.metrics import JOURNAL_FSYNC_RECORDS, JOURNAL_PENDING_ROWS
+
+logger = logging.getLogger(__name__)
+
+request_user: contextvars.ContextVar[int | None] = contextvars.ContextVar("request_user", default=None)
+
+
+class WriteJournal:
+    """JSON lines log of column T writes, appended to and periodically compacted.
+
+    A write is recorded as {"seq", "ts", "user_id", "inventory_id", "row", "value"}
+    and fsynced before it is sent to the backend; {"done": [seq, ...]} follows
+    once the backend accepted it. Records are group-committed: a single
+    writer thread appends everything queued while the previous fsync ran,
+    then syncs once for the whole batch.
+
+    Once compact_after lines have been appended, the writer rewrites the
+    file atomically instead of appending: a {"compacted": ts, "seq": n}
+    line, then the latest record of each pending row. Confirmed history
+    is dropped, so disk use and startup parsing stay bounded.
+
+    The latest record of each row without a done marker is pending and is
+    returned by pending() for replay, including after a restart. Seqs of
+    writes in flight are owned by them and skipped by pending() until they
+    are confirmed or released. A write the backend rejected for good is
+    retired with {"failed": [seq], "status": code} instead of being retried.
+    """
+
+    def __init__(self, path: str, compact_after: int = 10000) -> None:
+        self.path = path
+        self.compact_after = compact_after
+        self._appended = 0
+        self._compact_at = compact_after
+        self._lock = threading.Lock()
+        self._buffer: list[str] = []
+        self._waiters: list[concurrent.futures.Future] = []
+        self._writing = False
+        self._seq = 0
+        self._latest: dict[int, dict] = {}
+        self._pending: set[int] = set()
+        self._owned: set[int] = set()
+        self._overlapped: set[int] = set()
+        self._load()
+
+    def _load(self) -> None:
+        """Rebuild sequence and pending rows from an existing journal. A torn last line is ignored."""
+        done: set[int] = set()
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    self._appended += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "compacted" in record:
+                        self._seq = max(self._seq, record["seq"])
+                    elif "done" in record:
+                        done.update(record["done"])
+                    elif "failed" in record:
+                        done.update(record["failed"])
+                    else:
+                        self._seq = max(self._seq, record["seq"])
+                        latest = self._latest.get(record["row"])
+                        if latest is None or record["seq"] > latest["seq"]:
+                            self._latest[record["row"]] = record
+        except FileNotFoundError:
+            return
+        self._pending = {row for row, record in self._latest.items() if record["seq"] not in done}
+        JOURNAL_PENDING_ROWS.set(len(self._pending))
+
+    async def record(self, updates: dict[int, bool], inventory_ids: dict[int, str]) -> list[int]:
+        """Durably append one record per row. Returns their sequence numbers once fsynced.
+
+        The seqs are owned by the caller's write until mark_done() or release().
+        """
+        now = time.time()
+        user_id = request_user.get()
+        with self._lock:
+            seqs = []
+            for row_index, value in updates.items():
+                self._seq += 1
+                record = {
+                    "seq": self._seq,
+                    "ts": now,
+                    "user_id": user_id,
+                    "inventory_id": inventory_ids.get(row_index, ""),
+                    "row": row_index,
+                    "value": value
+                }
+                self._latest[row_index] = record
+                self._pending.add(row_index)
+                self._owned.add(self._seq)
+                self._buffer.append(json.dumps(record, ensure_ascii=False))
+                seqs.append(self._seq)
+            future = concurrent.futures.Future()
+            self._waiters.append(future)
+            self._start_writer()
+            JOURNAL_PENDING_ROWS.set(len(self._pending))
+        await asyncio.wrap_future(future)
+        return seqs
+
+    def mark_done(self, seqs: list[int]) -> None:
+        """Record that the backend accepted seqs. Not waited for: a lost marker only causes an idempotent replay.
+
+        A row a replay wrote while this write was in flight stays pending: the two may have
+        reached the backend in either order, so its latest value is written once more.
+        """
+        if not seqs:
+            return
+        done = set(seqs)
+        with self._lock:
+            self._owned.difference_update(done)
+            for row_index in [row for row in self._pending if self._latest[row]["seq"] in done]:
+                if row_index in self._overlapped:
+                    self._overlapped.discard(row_index)
+                    done.discard(self._latest[row_index]["seq"])
+                else:
+                    self._pending.discard(row_index)
+            if done:
+                self._buffer.append(json.dumps({"done": sorted(done)}))
+                self._start_writer()
+            JOURNAL_PENDING_ROWS.set(len(self._pending))
+
+    def release(self, seqs: list[int]) -> None:
+        """Give up ownership of seqs whose write failed, so replay picks them up."""
+        with self._lock:
+            self._owned.difference_update(seqs)
+
+    def retire(self, seq: int, row_index: int, status: int) -> None:
+        """Stop replaying seq after the backend rejected it with a non-retryable status."""
+        with self._lock:
+            self._owned.discard(seq)
+            if self._latest[row_index]["seq"] == seq:
+                self._pending.discard(row_index)
+                self._overlapped.discard(row_index)
+            self._buffer.append(json.dumps({"failed": [seq], "status": status}))
+            self._start_writer()
+            JOURNAL_PENDING_ROWS.set(len(self._pending))
+
+    def pending(self) -> list[dict]:
+        """Latest record of every row the backend has not confirmed and no write owns, oldest first."""
+        with self._lock:
+            records = (self._latest[row] for row in self._pending)
+            return sorted(
+                (record for record in records if record["seq"] not in self._owned),
+                key=lambda record: record["seq"]
+            )
+
+    def claim(self, seq: int, row_index: int) -> bool:
+        """Take ownership of seq for a replay write. False if it was superseded, confirmed or is owned already."""
+        with self._lock:
+            record = self._latest.get(row_index)
+            if record is None or record["seq"] != seq or row_index not in self._pending or seq in self._owned:
+                return False
+            self._owned.add(seq)
+            return True
+
+    def finish_replay(self, seq: int, row_index: int) -> None:
+        """Confirm a claimed replay write, re-checking under the lock whether the row changed meanwhile.
+
+        If a newer record arrived during the write, the replay may have overwritten it,
+        so that row is kept pending to write its latest value again.
+        """
+        with self._lock:
+            self._owned.discard(seq)
+            latest = self._latest[row_index]
+            if latest["seq"] == seq:
+                self._pending.discard(row_index)
+                self._overlapped.discard(row_index)
+            elif latest["seq"] in self._owned:
+                self._overlapped.add(row_index)
+            else:
+                self._pending.add(row_index)
+            self._buffer.append(json.dumps({"done": [seq]}))
+            self._start_writer()
+            JOURNAL_PENDING_ROWS.set(len(self._pending))
+
+    def _start_writer(self) -> None:
+        if not self._writing:
+            self._writing = True
+            threading.Thread(target=self._drain, name="journal-writer", daemon=True).start()
+
+    def _drain(self) -> None:
+        while True:
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+                waiters, self._waiters = self._waiters, []
+                if not lines:
+                    self._writing = False
+                    return
+                self._appended += len(lines)
+                compacted = self._compacted_lines() if self._appended >= self._compact_at else None
+            try:
+                if compacted is None or not self._compact(compacted):
+                    with open(self.path, "a", encoding="utf-8") as file:
+                        file.write("\n".join(lines) + "\n")
+                        file.flush()
+                        os.fsync(file.fileno())
+            except OSError as e:
+                logger.error("Failed to append to write journal %s: %s", self.path, e)
+                for waiter in waiters:
+                    waiter.set_exception(e)
+                continue
+            JOURNAL_FSYNC_RECORDS.observe(len(lines))
+            for waiter in waiters:
+                waiter.set_result(None)
+
+    def _compacted_lines(self) -> list[str]:
+        """Journal content equivalent to the current state. Call under the lock.
+
+        It already covers every line taken from the buffer, so those are not appended after it.
+        """
+        records = sorted((self._latest[row] for row in self._pending), key=lambda record: record["seq"])
+        lines = [json.dumps({"compacted": time.time(), "seq": self._seq})]
+        lines.extend(json.dumps(record, ensure_ascii=False) for record in records)
+        return lines
+
+    def _compact(self, lines: list[str]) -> bool:
+        """Rewrite the journal as lines. On failure the caller appends its batch as usual."""
+        try:
+            self._rewrite(lines)
+        except OSError as e:
+            logger.warning("Failed to compact write journal %s: %s", self.path, e)
+            return False
+        # Many rows may stay pending; do not rewrite again until the file at least doubles.
+        self._appended = len(lines)
+        self._compact_at = max(self.compact_after, 2 * len(lines))
+        return True
+
+    def _rewrite(self, lines: list[str]) -> None:
+        """Replace the journal with lines atomically and durably (temp file, fsync, rename, directory fsync)."""
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.path)
+        directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
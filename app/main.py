@@ -1,15 +1,137 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse, HTMLResponse, RedirectResponse, StreamingResponse
-from pydantic import BaseModel
-from io import BytesIO
+import asyncio
+import bisect
+import hmac
+import json
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.config import config
+from app.storage import InventoryStore, StoreBusyError, close_store, get_store
+from app.item_row import parse_fields
+from app.items_index import normalize_inventory_id
+from app.items_snapshot import item_etag, version_etag
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, HttpMetricsMiddleware, render_metrics
+from app.webapp_assets import WEBAPP_CACHE_CONTROL, render_webapp
+from app.webhook import get_webhook_pool, register_webhook, start_webhook
+from app.write_queue import get_write_queue
+
+ITEMS_PAGE_MAX = 5000
+SEARCH_LIMIT_MAX = 100
+BATCH_CHECK_MAX = 1000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+logger = logging.getLogger(__name__)
+
+
+async def restore_items_snapshot() -> asyncio.Task | None:
+    """Serve persisted items snapshot right away and refresh it from the backend in the background.
+
+    The file is parsed in a worker thread so the event loop stays free while it loads.
+    """
+    try:
+        store = get_store()
+        started = time.perf_counter()
+        if not await asyncio.to_thread(store.restore_snapshot):
+            return None
+    except Exception:
+        logger.exception("Failed to restore items snapshot")
+        return None
+    logger.info("Restored items snapshot in %.1f ms", (time.perf_counter() - started) * 1000)
+    return asyncio.create_task(refresh_restored_snapshot(store))
+
+
+async def replay_write_journal() -> None:
+    """Retry journaled column T writes the backend never confirmed: at startup, then every JOURNAL_REPLAY_INTERVAL."""
+    while True:
+        try:
+            written = await get_store().replay_journal()
+            if written:
+                logger.info("Replayed %d journaled checkbox writes", written)
+        except Exception:
+            logger.warning("Replay of journaled checkbox writes failed", exc_info=True)
+        await asyncio.sleep(config.JOURNAL_REPLAY_INTERVAL)
+
+
+async def refresh_restored_snapshot(store: InventoryStore) -> None:
+    try:
+        await store.refresh()
+    except Exception:
+        logger.warning("Background refresh of restored items snapshot failed", exc_info=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Restore persisted items snapshot, replay the write journal and run Telegram webhook workers in webhook mode."""
+    restore_task = asyncio.create_task(restore_items_snapshot())
+    replay_task = asyncio.create_task(replay_write_journal())
+    pool = None
+    registration_task = None
+    if config.is_webhook_mode():
+        pool = await start_webhook()
+        registration_task = asyncio.create_task(register_webhook())
+    refresh_task = await restore_task
+    yield
+    if registration_task is not None:
+        registration_task.cancel()
+    if pool is not None:
+        await pool.stop()
+    if refresh_task is not None:
+        refresh_task.cancel()
+    replay_task.cancel()
+    await close_store()
 
-from app.google_sheets import get_sheets_client
 
 app = FastAPI(
     title="Warehouse Bot WebApp API",
     description="REST API for managing warehouse items and labels in Google Sheets",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+app.add_middleware(HttpMetricsMiddleware)
+
+
+class BatchCheckRequest(BaseModel):
+    inventory_ids: list[str] = Field(min_length=1, max_length=BATCH_CHECK_MAX)
+
+
+class BatchCheckResult(BaseModel):
+    inventory_id: str
+    status: str
+
+
+class BatchCheckResponse(BaseModel):
+    status: str
+    updated: int
+    results: list[BatchCheckResult]
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Return True if If-None-Match header matches etag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def busy_response(error: StoreBusyError) -> JSONResponse:
+    """503 with Retry-After when the inventory backend request budget is exhausted."""
+    return JSONResponse(
+        status_code=503,
+        content={"error": "inventory backend is busy, retry later"},
+        headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+    )
 
 
 class CheckRequest(BaseModel):
@@ -39,16 +161,100 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: Sheets latency, cache hits, HTTP and bot handler latency, queue depth."""
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/items", response_model=list[dict])
-async def get_all_items():
+async def get_all_items(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=ITEMS_PAGE_MAX),
+    cursor: int | None = Query(None, ge=0),
+    fields: str | None = None
+):
+    """
+    Get items from ITEMS sheet.
+    Optional limit/cursor pagination (cursor is the row_index to continue after,
+    next one is returned in X-Next-Cursor header) and fields projection,
+    e.g. fields=inventory_id,B,V,checkbox_t.
+    Sends application/x-ndjson stream when requested via Accept header.
+    Returns ETag of the cached snapshot version and answers If-None-Match with 304.
+    """
+    try:
+        projection = parse_fields(fields)
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
+    
+    try:
+        store = get_store()
+        snapshot = await store.get_items_snapshot()
+    except StoreBusyError as e:
+        return busy_response(e)
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": "internal server error"}
+        )
+    
+    ndjson = NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+    etag = version_etag("items", snapshot.version, "-ndjson" if ndjson else "")
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    
+    items = snapshot.items
+    start = 0
+    if cursor is not None:
+        start = bisect.bisect_right(items, cursor, key=lambda item: item.row_index)
+    end = len(items) if limit is None else min(start + limit, len(items))
+    page = items[start:end]
+    
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    if end < len(items):
+        headers["X-Next-Cursor"] = str(page[-1].row_index)
+    
+    if ndjson:
+        def generate():
+            for item in page:
+                yield json.dumps(item.to_dict(projection), ensure_ascii=False) + "\n"
+        
+        return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+    
+    return JSONResponse(
+        content=[item.to_dict(projection) for item in page],
+        headers=headers
+    )
+
+
+@app.get("/items/search", response_model=list[dict])
+async def search_items(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=SEARCH_LIMIT_MAX),
+    fields: str | None = None
+):
     """
-    Get all items from ITEMS sheet.
-    Returns list of items with their data and checkbox status.
+    Fuzzy search by equipment name (column B) and storage location (column V).
+    Results are ranked by trigram similarity to q, best first.
+    Optional fields projection as in GET /items.
     """
     try:
-        client = get_sheets_client()
-        items = client.get_all_items()
-        return items
+        projection = parse_fields(fields)
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
+    
+    try:
+        store = get_store()
+        items = await store.search_items(q, limit)
+        return JSONResponse(content=[item.to_dict(projection) for item in items])
+    except StoreBusyError as e:
+        return busy_response(e)
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -57,14 +263,18 @@ async def get_all_items():
 
 
 @app.get("/items/{inventory_id}", response_model=dict)
-async def get_item_by_id(inventory_id: str):
+async def get_item_by_id(inventory_id: str, request: Request):
     """
     Get item by inventory_id.
     Returns item data if found, 404 if not found.
+    Returns ETag of the row content and answers If-None-Match with 304.
     """
     try:
-        client = get_sheets_client()
-        item = client.find_item_by_inventory_id(inventory_id)
+        store = get_store()
+        snapshot = store.cached_items_snapshot()
+        item = snapshot.find(inventory_id) if snapshot is not None else None
+        if item is None:
+            item = await store.find_item_by_inventory_id(inventory_id)
         
         if item is None:
             return JSONResponse(
@@ -72,36 +282,78 @@ async def get_item_by_id(inventory_id: str):
                 content={"error": "inventory_id not found"}
             )
         
-        return item
+        etag = item_etag(item)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        
+        return JSONResponse(
+            content=item.to_dict(),
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
+    except StoreBusyError as e:
+        return busy_response(e)
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": "internal server error"}
+        )
+
+
+@app.get("/stats", response_model=dict)
+async def get_stats(request: Request):
+    """
+    Stocktake progress: checked/unchecked counts (column T) overall and per storage location (column V).
+    Counts are kept up to date on every check/uncheck, rows are not re-scanned per request.
+    Returns ETag of the snapshot version and answers If-None-Match with 304.
+    """
+    try:
+        store = get_store()
+        stats = await store.get_stock_stats()
+    except StoreBusyError as e:
+        return busy_response(e)
     except Exception as e:
         return JSONResponse(
             status_code=500,
             content={"error": "internal server error"}
         )
+    
+    etag = version_etag("stats", stats["version"])
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    
+    return JSONResponse(
+        content=stats,
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
 
 
 @app.post("/items/check", response_model=CheckResponse)
 async def check_item(request: CheckRequest):
     """
     Mark item checkbox (column T) as TRUE.
-    Accepts inventory_id in request body.
+    Accepts inventory_id in request body; its cached row is confirmed with a one-cell read before writing.
     """
     try:
-        client = get_sheets_client()
-        item = client.find_item_by_inventory_id(request.inventory_id)
+        store = get_store()
+        item = await store.lookup_inventory_id(request.inventory_id)
+        row_index = None
+        if item is not None:
+            row_index = await store.verify_row(item.inventory_id, item.row_index)
         
-        if item is None:
+        if row_index is None:
             return JSONResponse(
                 status_code=404,
                 content={"error": "inventory_id not found"}
             )
         
-        client.update_checkbox(item["row_index"], True)
+        await get_write_queue().submit(row_index, True, item.inventory_id)
         
         return CheckResponse(
             status="ok",
             inventory_id=request.inventory_id
         )
+    except StoreBusyError as e:
+        return busy_response(e)
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -113,24 +365,29 @@ async def check_item(request: CheckRequest):
 async def uncheck_item(request: CheckRequest):
     """
     Mark item checkbox (column T) as FALSE.
-    Accepts inventory_id in request body.
+    Accepts inventory_id in request body; its cached row is confirmed with a one-cell read before writing.
     """
     try:
-        client = get_sheets_client()
-        item = client.find_item_by_inventory_id(request.inventory_id)
+        store = get_store()
+        item = await store.lookup_inventory_id(request.inventory_id)
+        row_index = None
+        if item is not None:
+            row_index = await store.verify_row(item.inventory_id, item.row_index)
         
-        if item is None:
+        if row_index is None:
             return JSONResponse(
                 status_code=404,
                 content={"error": "inventory_id not found"}
             )
         
-        client.update_checkbox(item["row_index"], False)
+        await get_write_queue().submit(row_index, False, item.inventory_id)
         
         return CheckResponse(
             status="ok",
             inventory_id=request.inventory_id
         )
+    except StoreBusyError as e:
+        return busy_response(e)
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -138,625 +395,136 @@ async def uncheck_item(request: CheckRequest):
         )
 
 
-@app.get("/webapp")
-async def webapp(request: Request):
-    """WebApp interface for QR scanning and item management."""
-    base_url = str(request.base_url).rstrip("/")
+async def set_checkboxes_batch(inventory_ids: list[str], value: bool) -> BatchCheckResponse:
+    """Resolve inventory_ids against one index snapshot and write found rows in a single batchUpdate.
+
+    Rows taken from the index are confirmed with one column K read first, so moved items are followed.
+    """
+    store = get_store()
+    entries = await store.lookup_inventory_ids(inventory_ids)
     
-    # Use template string and replace to avoid f-string escaping issues
-    html_template = """
-<!DOCTYPE html>
-<html lang="ru">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0, user-scalable=no">
-    <title>Warehouse Scanner</title>
-    <script src="https://telegram.org/js/telegram-web-app.js"></script>
-    <style>
-        * {{
-            box-sizing: border-box;
-            margin: 0;
-            padding: 0;
-        }}
-        
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-            background: var(--tg-theme-bg-color, #ffffff);
-            color: var(--tg-theme-text-color, #000000);
-            min-height: 100vh;
-            padding: 16px;
-            padding-bottom: 80px;
-        }}
-        
-        .container {{
-            max-width: 600px;
-            margin: 0 auto;
-        }}
-        
-        .header {{
-            text-align: center;
-            margin-bottom: 24px;
-        }}
-        
-        .header h1 {{
-            font-size: 24px;
-            font-weight: 600;
-            color: var(--tg-theme-text-color, #000000);
-            margin-bottom: 8px;
-        }}
-        
-        .header p {{
-            font-size: 14px;
-            color: var(--tg-theme-hint-color, #999999);
-        }}
-        
-        .scan-section {{
-            background: var(--tg-theme-secondary-bg-color, #f0f0f0);
-            border-radius: 16px;
-            padding: 20px;
-            margin-bottom: 24px;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-        }}
-        
-        .input-group {{
-            display: flex;
-            gap: 8px;
-            margin-bottom: 12px;
-        }}
-        
-        .input-group input {{
-            flex: 1;
-            padding: 14px 16px;
-            font-size: 16px;
-            border: 2px solid var(--tg-theme-hint-color, #e0e0e0);
-            border-radius: 12px;
-            background: var(--tg-theme-bg-color, #ffffff);
-            color: var(--tg-theme-text-color, #000000);
-            outline: none;
-            transition: border-color 0.2s;
-        }}
-        
-        .input-group input:focus {{
-            border-color: var(--tg-theme-button-color, #3390ec);
-        }}
-        
-        .btn {{
-            padding: 14px 24px;
-            font-size: 16px;
-            font-weight: 600;
-            border: none;
-            border-radius: 12px;
-            cursor: pointer;
-            transition: all 0.2s;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            gap: 8px;
-        }}
-        
-        .btn-primary {{
-            background: var(--tg-theme-button-color, #3390ec);
-            color: var(--tg-theme-button-text-color, #ffffff);
-        }}
-        
-        .btn-primary:active {{
-            opacity: 0.8;
-            transform: scale(0.98);
-        }}
-        
-        .btn-secondary {{
-            background: var(--tg-theme-secondary-bg-color, #f0f0f0);
-            color: var(--tg-theme-text-color, #000000);
-        }}
-        
-        .btn-secondary:active {{
-            opacity: 0.8;
-        }}
-        
-        .btn-success {{
-            background: #4caf50;
-            color: #ffffff;
-        }}
-        
-        .btn-danger {{
-            background: #f44336;
-            color: #ffffff;
-        }}
-        
-        .btn:disabled {{
-            opacity: 0.5;
-            cursor: not-allowed;
-        }}
-        
-        .item-card {{
-            background: var(--tg-theme-secondary-bg-color, #f0f0f0);
-            border-radius: 16px;
-            padding: 20px;
-            margin-bottom: 16px;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-            display: none;
-        }}
-        
-        .item-card.show {{
-            display: block;
-            animation: slideIn 0.3s ease-out;
-        }}
-        
-        @keyframes slideIn {{
-            from {{
-                opacity: 0;
-                transform: translateY(-10px);
-            }}
-            to {{
-                opacity: 1;
-                transform: translateY(0);
-            }}
-        }}
-        
-        .item-header {{
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-            margin-bottom: 16px;
-            padding-bottom: 12px;
-            border-bottom: 2px solid var(--tg-theme-hint-color, #e0e0e0);
-        }}
-        
-        .item-title {{
-            font-size: 20px;
-            font-weight: 600;
-            color: var(--tg-theme-text-color, #000000);
-        }}
-        
-        .item-status {{
-            padding: 6px 12px;
-            border-radius: 20px;
-            font-size: 12px;
-            font-weight: 600;
-        }}
-        
-        .item-status.checked {{
-            background: #4caf50;
-            color: #ffffff;
-        }}
-        
-        .item-status.unchecked {{
-            background: #ff9800;
-            color: #ffffff;
-        }}
-        
-        .item-info {{
-            margin-bottom: 16px;
-        }}
-        
-        .info-row {{
-            display: flex;
-            justify-content: space-between;
-            padding: 12px 0;
-            border-bottom: 1px solid var(--tg-theme-hint-color, #e0e0e0);
-        }}
-        
-        .info-row:last-child {{
-            border-bottom: none;
-        }}
-        
-        .info-label {{
-            font-size: 14px;
-            color: var(--tg-theme-hint-color, #999999);
-            font-weight: 500;
-        }}
-        
-        .info-value {{
-            font-size: 14px;
-            color: var(--tg-theme-text-color, #000000);
-            font-weight: 600;
-            text-align: right;
-            max-width: 60%;
-            word-break: break-word;
-        }}
-        
-        .item-actions {{
-            display: flex;
-            gap: 12px;
-            margin-top: 16px;
-        }}
-        
-        .item-actions .btn {{
-            flex: 1;
-        }}
-        
-        .status-message {{
-            padding: 12px 16px;
-            border-radius: 12px;
-            margin-top: 12px;
-            text-align: center;
-            font-size: 14px;
-            font-weight: 500;
-            display: none;
-        }}
-        
-        .status-message.show {{
-            display: block;
-            animation: fadeIn 0.3s ease-out;
-        }}
-        
-        @keyframes fadeIn {{
-            from {{ opacity: 0; }}
-            to {{ opacity: 1; }}
-        }}
-        
-        .status-message.success {{
-            background: #e8f5e9;
-            color: #2e7d32;
-        }}
-        
-        .status-message.error {{
-            background: #ffebee;
-            color: #c62828;
-        }}
-        
-        .status-message.loading {{
-            background: #e3f2fd;
-            color: #1565c0;
-        }}
-        
-        .loading-spinner {{
-            display: inline-block;
-            width: 16px;
-            height: 16px;
-            border: 2px solid currentColor;
-            border-radius: 50%;
-            border-top-color: transparent;
-            animation: spin 0.8s linear infinite;
-            margin-right: 8px;
-        }}
-        
-        @keyframes spin {{
-            to {{ transform: rotate(360deg); }}
-        }}
-        
-        .empty-state {{
-            text-align: center;
-            padding: 40px 20px;
-            color: var(--tg-theme-hint-color, #999999);
-        }}
-        
-        .empty-state-icon {{
-            font-size: 48px;
-            margin-bottom: 16px;
-        }}
-        
-        .empty-state-text {{
-            font-size: 16px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🏭 Warehouse Scanner</h1>
-            <p>Сканируйте QR-код или введите inventory_id</p>
-        </div>
-        
-        <div class="scan-section">
-            <button class="btn btn-primary" onclick="scanQR()" style="width: 100%; margin-bottom: 12px;">
-                📷 Сканировать QR-код
-            </button>
-            <div class="input-group">
-                <input 
-                    type="text" 
-                    id="inventoryId" 
-                    placeholder="Или введите inventory_id вручную"
-                    autocomplete="off"
-                >
-            </div>
-            <button class="btn btn-primary" onclick="searchItem()" style="width: 100%;">
-                🔍 Найти оборудование
-            </button>
-            <div id="statusMessage" class="status-message"></div>
-        </div>
-        
-        <div id="itemCard" class="item-card">
-            <div class="item-header">
-                <div class="item-title" id="itemTitle">Оборудование</div>
-                <div class="item-status" id="itemStatus">Не проверено</div>
-            </div>
-            <div class="item-info">
-                <div class="info-row">
-                    <span class="info-label">📦 Название:</span>
-                    <span class="info-value" id="itemName">—</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">📍 Место хранения:</span>
-                    <span class="info-value" id="itemLocation">—</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">🆔 Inventory ID:</span>
-                    <span class="info-value" id="itemInventoryId">—</span>
-                </div>
-            </div>
-            <div class="item-actions">
-                <button class="btn btn-success" onclick="checkItem()" id="checkBtn">
-                    ✅ Отметить
-                </button>
-                <button class="btn btn-danger" onclick="uncheckItem()" id="uncheckBtn">
-                    ❌ Снять отметку
-                </button>
-            </div>
-        </div>
-        
-        <div id="emptyState" class="empty-state">
-            <div class="empty-state-icon">📦</div>
-            <div class="empty-state-text">Введите или отсканируйте inventory_id</div>
-        </div>
-    </div>
+    resolved = []
+    seen: set[str] = set()
+    for inventory_id, entry in zip(inventory_ids, entries):
+        key = normalize_inventory_id(inventory_id)
+        resolved.append((inventory_id, None if key in seen else entry, key in seen))
+        seen.add(key)
     
-    <script>
-        const tg = window.Telegram.WebApp;
-        tg.ready();
-        tg.expand();
-        
-        const API_BASE_URL = 'BASE_URL_PLACEHOLDER';
-        let currentItem = null;
-        
-        console.log('WebApp initialized. API_BASE_URL:', API_BASE_URL);
-        console.log('Telegram WebApp platform:', tg.platform);
-        
-        function showStatus(message, type = 'loading') {{
-            const statusEl = document.getElementById('statusMessage');
-            statusEl.textContent = message;
-            statusEl.className = `status-message show ${{type}}`;
-            
-            if (type !== 'loading') {{
-                setTimeout(() => {{
-                    statusEl.classList.remove('show');
-                }}, 3000);
-            }}
-        }}
-        
-        function hideStatus() {{
-            const statusEl = document.getElementById('statusMessage');
-            statusEl.classList.remove('show');
-        }}
-        
-        function scanQR() {{
-            console.log('scanQR called, platform:', tg.platform);
-            
-            if (tg.platform === 'unknown') {{
-                showStatus('Сканирование QR доступно только в Telegram', 'error');
-                return;
-            }}
-            
-            if (!tg.showScanQrPopup) {{
-                console.error('showScanQrPopup not available');
-                showStatus('Сканирование QR недоступно в этой версии Telegram', 'error');
-                return;
-            }}
-            
-            try {{
-                tg.showScanQrPopup({{
-                    text: 'Наведите камеру на QR-код'
-                }}, (text) => {{
-                    console.log('QR scan result:', text);
-                    if (text && text.trim()) {{
-                        const inventoryId = text.trim();
-                        document.getElementById('inventoryId').value = inventoryId;
-                        searchItem();
-                    }} else {{
-                        showStatus('QR-код не распознан. Попробуйте еще раз.', 'error');
-                    }}
-                }});
-            }} catch (error) {{
-                console.error('QR scan error:', error);
-                showStatus('Ошибка при сканировании QR: ' + error.message, 'error');
-            }}
-        }}
-        
-        async function searchItem() {{
-            const inventoryId = document.getElementById('inventoryId').value.trim();
-            
-            if (!inventoryId) {{
-                showStatus('Введите inventory_id', 'error');
-                return;
-            }}
-            
-            showStatus('Поиск оборудования...', 'loading');
-            
-            const url = `${{API_BASE_URL}}/items/${{inventoryId}}`;
-            console.log('Searching item, URL:', url);
-            
-            try {{
-                const response = await fetch(url);
-                console.log('Response status:', response.status);
-                
-                if (response.status === 404) {{
-                    const error = await response.json();
-                    showStatus(`Оборудование не найдено: ${{inventoryId}}`, 'error');
-                    hideItemCard();
-                    return;
-                }}
-                
-                if (!response.ok) {{
-                    const errorText = await response.text();
-                    console.error('Server error:', errorText);
-                    throw new Error(`Ошибка сервера: ${{response.status}}`);
-                }}
-                
-                const item = await response.json();
-                console.log('Item found:', item);
-                currentItem = item;
-                displayItem(item);
-                hideStatus();
-                
-            }} catch (error) {{
-                console.error('Search error:', error);
-                showStatus('Ошибка при поиске оборудования: ' + error.message, 'error');
-            }}
-        }}
-        
-        function displayItem(item) {{
-            const card = document.getElementById('itemCard');
-            const emptyState = document.getElementById('emptyState');
-            
-            document.getElementById('itemTitle').textContent = item.data?.B || 'Оборудование';
-            document.getElementById('itemName').textContent = item.data?.B || '—';
-            document.getElementById('itemLocation').textContent = item.data?.V || '—';
-            document.getElementById('itemInventoryId').textContent = item.inventory_id || '—';
-            
-            const statusEl = document.getElementById('itemStatus');
-            if (item.checkbox_t) {{
-                statusEl.textContent = 'Отмечено';
-                statusEl.className = 'item-status checked';
-            }} else {{
-                statusEl.textContent = 'Не отмечено';
-                statusEl.className = 'item-status unchecked';
-            }}
-            
-            card.classList.add('show');
-            emptyState.style.display = 'none';
-        }}
-        
-        function hideItemCard() {{
-            const card = document.getElementById('itemCard');
-            const emptyState = document.getElementById('emptyState');
-            card.classList.remove('show');
-            emptyState.style.display = 'block';
-            currentItem = null;
-        }}
-        
-        async function checkItem() {{
-            if (!currentItem) return;
-            
-            const btn = document.getElementById('checkBtn');
-            btn.disabled = true;
-            showStatus('Обновление...', 'loading');
-            
-            try {{
-                const response = await fetch(`${{API_BASE_URL}}/items/check`, {{
-                    method: 'POST',
-                    headers: {{
-                        'Content-Type': 'application/json'
-                    }},
-                    body: JSON.stringify({{
-                        inventory_id: currentItem.inventory_id
-                    }})
-                }});
-                
-                if (!response.ok) {{
-                    const error = await response.json();
-                    throw new Error(error.error || 'Ошибка обновления');
-                }}
-                
-                const result = await response.json();
-                currentItem.checkbox_t = true;
-                displayItem(currentItem);
-                showStatus('✅ Отметка установлена', 'success');
-                
-            }} catch (error) {{
-                showStatus('Ошибка при обновлении', 'error');
-                console.error('Check error:', error);
-            }} finally {{
-                btn.disabled = false;
-            }}
-        }}
-        
-        async function uncheckItem() {{
-            if (!currentItem) return;
-            
-            const btn = document.getElementById('uncheckBtn');
-            btn.disabled = true;
-            showStatus('Обновление...', 'loading');
-            
-            try {{
-                const response = await fetch(`${{API_BASE_URL}}/items/uncheck`, {{
-                    method: 'POST',
-                    headers: {{
-                        'Content-Type': 'application/json'
-                    }},
-                    body: JSON.stringify({{
-                        inventory_id: currentItem.inventory_id
-                    }})
-                }});
-                
-                if (!response.ok) {{
-                    const error = await response.json();
-                    throw new Error(error.error || 'Ошибка обновления');
-                }}
-                
-                const result = await response.json();
-                currentItem.checkbox_t = false;
-                displayItem(currentItem);
-                showStatus('❌ Отметка снята', 'success');
-                
-            }} catch (error) {{
-                showStatus('Ошибка при обновлении', 'error');
-                console.error('Uncheck error:', error);
-            }} finally {{
-                btn.disabled = false;
-            }}
-        }}
-        
-        document.getElementById('inventoryId').addEventListener('keypress', (e) => {{
-            if (e.key === 'Enter') {{
-                searchItem();
-            }}
-        }});
-        
-        // Проверка доступности API при загрузке
-        async function checkAPI() {{
-            try {{
-                const response = await fetch(`${{API_BASE_URL}}/health`);
-                if (response.ok) {{
-                    console.log('API is available');
-                }} else {{
-                    console.warn('API health check failed:', response.status);
-                }}
-            }} catch (error) {{
-                console.error('API health check error:', error);
-                showStatus('Предупреждение: не удалось подключиться к серверу', 'error');
-            }}
-        }}
-        
-        // Автоматически предлагаем сканировать QR при открытии WebApp
-        if (tg.platform !== 'unknown') {{
-            // Небольшая задержка для лучшего UX
-            setTimeout(() => {{
-                const firstTime = !localStorage.getItem('webapp_opened');
-                if (firstTime) {{
-                    localStorage.setItem('webapp_opened', 'true');
-                    showStatus('Нажмите "Сканировать QR-код" для начала работы', 'loading');
-                }}
-                checkAPI();
-            }}, 500);
-        }} else {{
-            checkAPI();
-        }}
-    </script>
-</body>
-</html>
-"""
+    hints = {entry.inventory_id: entry.row_index for _, entry, _ in resolved if entry is not None}
+    rows = await store.verify_rows(hints) if hints else {}
+    
+    results = []
+    updates: dict[int, bool] = {}
+    updated_ids: dict[int, str] = {}
+    for inventory_id, entry, duplicate in resolved:
+        row_index = rows.get(entry.inventory_id) if entry is not None else None
+        if duplicate:
+            status = "duplicate"
+        elif row_index is None:
+            status = "not_found"
+        else:
+            status = "ok"
+            updates[row_index] = value
+            updated_ids[row_index] = entry.inventory_id
+        results.append(BatchCheckResult(inventory_id=inventory_id, status=status))
+    
+    if updates:
+        await store.batch_update_checkboxes(updates, updated_ids)
+    
+    return BatchCheckResponse(status="ok", updated=len(updates), results=results)
+
+
+@app.post("/items/check/batch", response_model=BatchCheckResponse)
+async def check_items_batch(request: BatchCheckRequest):
+    """
+    Mark checkbox (column T) as TRUE for many items.
+    Returns per-ID status: ok, not_found or duplicate.
+    """
+    try:
+        return await set_checkboxes_batch(request.inventory_ids, True)
+    except StoreBusyError as e:
+        return busy_response(e)
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": "internal server error"}
+        )
+
+
+@app.post("/items/uncheck/batch", response_model=BatchCheckResponse)
+async def uncheck_items_batch(request: BatchCheckRequest):
+    """
+    Mark checkbox (column T) as FALSE for many items.
+    Returns per-ID status: ok, not_found or duplicate.
+    """
+    try:
+        return await set_checkboxes_batch(request.inventory_ids, False)
+    except StoreBusyError as e:
+        return busy_response(e)
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": "internal server error"}
+        )
+
+
+@app.post("/telegram/webhook/{secret}")
+async def telegram_webhook(secret: str, request: Request):
+    """
+    Receive Telegram update and queue it for webhook workers.
+    Answers immediately; returns 503 when the queue is full so Telegram retries later.
+    """
+    if not config.is_webhook_mode() or not hmac.compare_digest(secret, config.TELEGRAM_WEBHOOK_SECRET):
+        return JSONResponse(status_code=404, content={"error": "not found"})
     
-    # Replace placeholder with actual base_url
-    html_content = html_template.replace('BASE_URL_PLACEHOLDER', base_url)
+    try:
+        update_data = await request.json()
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "invalid update"})
     
-    # Use StreamingResponse with BytesIO to avoid Content-Length calculation issues
-    # This approach forces chunked transfer encoding
-    html_bytes = html_content.encode('utf-8')
-    html_stream = BytesIO(html_bytes)
+    if not get_webhook_pool().submit(update_data):
+        return JSONResponse(status_code=503, content={"error": "update queue is full"})
+    return {"ok": True}
+
+
+@app.get("/telegram/webhook-queue")
+async def telegram_webhook_queue():
+    """Webhook queue depth, worker utilisation and backpressure counters."""
+    if not config.is_webhook_mode():
+        return JSONResponse(status_code=404, content={"error": "webhook mode disabled"})
+    return get_webhook_pool().stats()
+
+
+def webapp_response(request: Request, template: str) -> Response:
+    """Serve cached, precompressed WebApp page rendered for request base URL."""
+    base_url = str(request.base_url).rstrip("/")
+    asset = render_webapp(template, base_url)
+    body, etag, encoding = asset.select(request.headers.get("accept-encoding", ""))
     
-    async def generate():
-        html_stream.seek(0)
-        while True:
-            chunk = html_stream.read(8192)  # 8KB chunks
-            if not chunk:
-                break
-            yield chunk
+    headers = {
+        "ETag": etag,
+        "Cache-Control": WEBAPP_CACHE_CONTROL,
+        "Vary": "Accept-Encoding"
+    }
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
     
-    response = StreamingResponse(
-        generate(),
-        media_type="text/html; charset=utf-8"
+    return Response(
+        content=body,
+        media_type="text/html; charset=utf-8",
+        headers=headers
     )
-    # Ensure no Content-Length header is set
-    response.headers.pop("content-length", None)
-    
-    return response
+
+
+@app.get("/webapp")
+async def webapp(request: Request):
+    """WebApp interface for QR scanning and item management."""
+    return webapp_response(request, "scanner.html")
+
+
+@app.get("/webapp/qr-form")
+async def webapp_qr_form(request: Request):
+    """Minimal WebApp form that returns inventory_id to the bot via sendData."""
+    return webapp_response(request, "qr_form.html")
@@ -0,0 +1,82 @@
+import asyncio
+import random
+from collections import Counter
+from collections.abc import Sequence
+
+from app.item_row import CHECKBOX_COLUMN, COLUMN_LETTERS, INVENTORY_ID_COLUMN
+from app.storage import InventoryStore, StoreUnavailableError
+
+
+class InMemoryInventoryStore(InventoryStore):
+    """In-process stand-in for the ITEMS sheet with injected latency and failures.
+
+    Counts backend calls by Sheets operation name (get_full, get, batchGet, batchUpdate).
+    """
+
+    def __init__(
+        self,
+        rows: list[list[str]],
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = None
+    ) -> None:
+        super().__init__()
+        self.rows = rows
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls: Counter[str] = Counter()
+        self._random = random.Random(seed)
+
+    async def _round_trip(self, operation: str) -> None:
+        self.calls[operation] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise StoreUnavailableError(f"injected {operation} failure")
+
+    async def fetch_rows(self) -> list[list[str]]:
+        await self._round_trip("get_full")
+        return [list(row) for row in self.rows]
+
+    async def get_columns(self, columns: Sequence[str]) -> dict[str, list[str]]:
+        await self._round_trip("batchGet")
+        projected = {}
+        for column in columns:
+            position = COLUMN_LETTERS.index(column)
+            values = [row[position] if position < len(row) else "" for row in self.rows]
+            while values and values[-1] == "":
+                values.pop()
+            projected[column] = values
+        return projected
+
+    async def get_row_values(self, row_index: int, first_column: str = "A", last_column: str = "X") -> list[str]:
+        await self._round_trip("get")
+        if not 1 <= row_index <= len(self.rows):
+            return []
+        row = self.rows[row_index - 1]
+        return list(row[COLUMN_LETTERS.index(first_column):COLUMN_LETTERS.index(last_column) + 1])
+
+    async def write_checkboxes(self, updates: dict[int, bool]) -> None:
+        await self._round_trip("batchUpdate")
+        for row_index, value in updates.items():
+            while len(self.rows) < row_index:
+                self.rows.append([])
+            row = self.rows[row_index - 1]
+            if len(row) <= CHECKBOX_COLUMN:
+                row.extend([""] * (CHECKBOX_COLUMN + 1 - len(row)))
+            row[CHECKBOX_COLUMN] = "TRUE" if value else "FALSE"
+
+
+def make_synthetic_rows(count: int, seed: int = 0) -> list[list[str]]:
+    """Build synthetic ITEMS rows: unique inventory_id in K, names in B, shelves in V, checkbox in T."""
+    generator = random.Random(seed)
+    kinds = ("Drill", "Ladder", "Projector", "Laptop", "Monitor", "Printer", "Router", "Camera")
+    rows = []
+    for idx in range(count):
+        row = [f"{column}{idx + 1}" for column in COLUMN_LETTERS]
+        row[1] = f"{generator.choice(kinds)} model {idx % 997}"
+        row[INVENTORY_ID_COLUMN] = f"INV{idx + 1:06d}"
+        row[CHECKBOX_COLUMN] = "TRUE" if generator.random() < 0.3 else "FALSE"
+        row[21] = f"Shelf {idx % 40}-{idx % 7}"
+        rows.append(row)
+    return rows
@@ -0,0 +1,270 @@
+import bisect
+import threading
+import time
+from collections.abc import Sequence
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROWS_BUCKETS = (100, 1000, 5000, 10000, 25000, 50000, 100000, 250000, 500000)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8)
+BATCH_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric:
+    """Base for in-process metrics rendered in Prometheus text format.
+
+    Values are kept per label tuple under a lock, so metrics can be updated
+    from both event loops and the Sheets executor threads.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], object] = {}
+        if not self.labelnames and self.kind != "histogram":
+            self._values[()] = 0
+        registry.append(self)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            lines.extend(self._render_value(labels, value))
+        return lines
+
+    def _render_value(self, labels: tuple[str, ...], value) -> list[str]:
+        return [f"{self.name}{format_labels(self.labelnames, labels)} {format_number(value)}"]
+
+
+class Counter(Metric):
+    """Monotonic counter."""
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down, e.g. queue depth."""
+
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    """Histogram with fixed buckets; observe is one bisect and three additions."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][position] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, *labels: str) -> "Timer":
+        """Context manager observing elapsed seconds."""
+        return Timer(self, labels)
+
+    def _render_value(self, labels: tuple[str, ...], value) -> list[str]:
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+            cumulative += bucket_count
+            bucket_labels = format_labels((*self.labelnames, "le"), (*labels, format_number(bound)))
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        label_text = format_labels(self.labelnames, labels)
+        lines.append(f"{self.name}_sum{label_text} {format_number(total)}")
+        lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class Timer:
+    __slots__ = ("_histogram", "_labels", "_started")
+
+    def __init__(self, histogram: Histogram, labels: tuple[str, ...]) -> None:
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self) -> "Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._histogram.observe(time.perf_counter() - self._started, *self._labels)
+
+
+def format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry: list[Metric] = []
+
+
+def render_metrics() -> str:
+    """Render all registered metrics in Prometheus text exposition format."""
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class HttpMetricsMiddleware:
+    """ASGI middleware observing request latency by method, route template and status."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status)
+            )
+
+
+SHEETS_REQUEST_SECONDS = Histogram(
+    "sheets_request_duration_seconds",
+    "Google Sheets API call latency by operation, measured in the executor thread.",
+    ("operation",)
+)
+SHEETS_RESPONSE_BYTES = Histogram(
+    "sheets_response_bytes",
+    "Google Sheets API response body size by operation.",
+    ("operation",),
+    buckets=BYTES_BUCKETS
+)
+SHEETS_RETRIES = Counter(
+    "sheets_retries_total",
+    "Google Sheets calls retried after a 429, 5xx or connection error.",
+    ("operation", "reason")
+)
+SHEETS_SHED = Counter(
+    "sheets_shed_total",
+    "Google Sheets calls rejected before sending because the token bucket was exhausted.",
+    ("bucket", "priority")
+)
+SHEETS_CALLS_IN_FLIGHT = Gauge(
+    "sheets_calls_in_flight",
+    "Sheets calls submitted to the executor and not finished yet, queued ones included."
+)
+ITEMS_FETCH_ROWS = Histogram(
+    "items_fetch_rows",
+    "Rows returned by one full ITEMS fetch.",
+    buckets=ROWS_BUCKETS
+)
+ITEMS_PARSE_SECONDS = Histogram(
+    "items_parse_duration_seconds",
+    "Time spent turning one full ITEMS fetch into item records."
+)
+CACHE_REQUESTS = Counter(
+    "items_cache_requests_total",
+    "Lookups of the items index and snapshot caches by result.",
+    ("cache", "result")
+)
+CHANGE_CHECKS = Counter(
+    "items_change_checks_total",
+    "K/T change checks before a full reload by cache and result: unchanged, patched or reload.",
+    ("cache", "result")
+)
+SINGLE_FLIGHT_SHARED = Counter(
+    "items_fetch_coalesced_total",
+    "Backend fetches saved by joining an identical fetch already in flight.",
+    ("fetch",)
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method, route template and status.",
+    ("method", "route", "status")
+)
+BOT_HANDLER_SECONDS = Histogram(
+    "bot_handler_duration_seconds",
+    "Telegram update handling latency by handler.",
+    ("handler",)
+)
+WRITE_QUEUE_PENDING = Gauge(
+    "write_queue_pending_rows",
+    "Column T writes waiting for the next batch flush."
+)
+WEBHOOK_QUEUE_DEPTH = Gauge(
+    "webhook_queue_depth",
+    "Telegram updates waiting for a webhook worker."
+)
+WEBHOOK_BUSY_WORKERS = Gauge(
+    "webhook_busy_workers",
+    "Webhook workers currently handling an update."
+)
+JOURNAL_FSYNC_RECORDS = Histogram(
+    "journal_fsync_records",
+    "Write journal lines made durable by one fsync (group commit batch size).",
+    buckets=BATCH_BUCKETS
+)
+JOURNAL_PENDING_ROWS = Gauge(
+    "journal_pending_rows",
+    "Rows whose latest journaled column T write is not confirmed by the backend yet."
+)
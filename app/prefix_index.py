@@ -0,0 +1,66 @@
+import bisect
+import threading
+from collections import OrderedDict
+
+from app.item_row import ItemRow
+from app.items_index import normalize_inventory_id
+
+PREFIX_RESULTS_MAX = 50
+PREFIX_CACHE_SIZE = 4096
+
+
+def prefix_key(value: str) -> str:
+    """Case-insensitive key for prefix matching of inventory_ids."""
+    return normalize_inventory_id(value).casefold()
+
+
+class PrefixIndex:
+    """Sorted array of column K keys for inventory_id autocomplete.
+
+    A prefix is answered by two bisects over the sorted keys. Answers are
+    cached per prefix (LRU) until the next full read changes the rows.
+    """
+
+    def __init__(self) -> None:
+        self._keys: list[str] = []
+        self._rows: list[int] = []
+        self._cache: OrderedDict[str, list[int]] = OrderedDict()
+        self._source: list[ItemRow] | None = None
+        self._lock = threading.Lock()
+
+    def is_synced(self, items: list[ItemRow]) -> bool:
+        return items is self._source
+
+    def sync(self, items: list[ItemRow]) -> None:
+        """Rebuild sorted keys from items and drop cached answers."""
+        if items is self._source:
+            return
+        entries = sorted(
+            (key, item.row_index)
+            for item in items
+            if (key := prefix_key(item.inventory_id))
+        )
+        with self._lock:
+            self._keys = [key for key, _ in entries]
+            self._rows = [row_index for _, row_index in entries]
+            self._cache.clear()
+            self._source = items
+
+    def complete(self, prefix: str, limit: int) -> list[int]:
+        """Return up to limit row indexes whose inventory_id starts with prefix, in inventory_id order."""
+        key = prefix_key(prefix)
+        with self._lock:
+            rows = self._cache.get(key)
+            if rows is not None:
+                self._cache.move_to_end(key)
+            else:
+                start = bisect.bisect_left(self._keys, key)
+                end = start
+                stop = min(start + PREFIX_RESULTS_MAX, len(self._keys))
+                while end < stop and self._keys[end].startswith(key):
+                    end += 1
+                rows = self._rows[start:end]
+                self._cache[key] = rows
+                if len(self._cache) > PREFIX_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return rows[:limit]
@@ -0,0 +1,152 @@
+import math
+import re
+import threading
+from collections import defaultdict
+
+from app.item_row import COLUMN_LETTERS, ItemRow
+
+SEARCH_COLUMNS = ("B", "V")
+SEARCH_POSITIONS = tuple(COLUMN_LETTERS.index(column) for column in SEARCH_COLUMNS)
+MIN_SIMILARITY = 0.5
+BITMAP_MIN_ROWS = 512
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_search_text(value: str) -> str:
+    """Casefold and collapse whitespace, the same way for indexed text and queries."""
+    return WHITESPACE.sub(" ", str(value).casefold()).strip()
+
+
+def trigrams(text: str) -> set[str]:
+    """Character trigrams of normalized text, padded so word starts and ends count."""
+    padded = f"  {text} "
+    return {padded[position:position + 3] for position in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """Trigram inverted index over equipment name (B) and storage location (V).
+
+    Postings are kept as row sets for cheap incremental updates. At query
+    time each is used as an int bitmap (bit n = sheet row n), so matching and
+    counting shared trigrams are a few big-int operations per trigram;
+    bitmaps of postings with BITMAP_MIN_ROWS or more rows are prebuilt on sync.
+
+    Synced from ItemsSnapshot.source_items: only rows whose B or V text
+    changed since the previous full read are re-indexed, and column T
+    patches do not trigger a sync at all.
+    """
+
+    def __init__(self) -> None:
+        self._raw: dict[int, str] = {}
+        self._texts: dict[int, str] = {}
+        self._postings: defaultdict[str, set[int]] = defaultdict(set)
+        self._bitmaps: dict[str, int] = {}
+        self._dirty: set[str] = set()
+        self._source: list[ItemRow] | None = None
+        self._lock = threading.Lock()
+
+    def is_synced(self, items: list[ItemRow]) -> bool:
+        return items is self._source
+
+    def sync(self, items: list[ItemRow]) -> None:
+        """Bring index in line with items, re-indexing changed rows only. CPU-bound on first build."""
+        with self._lock:
+            if items is self._source:
+                return
+            raw_texts = self._raw
+            seen = set()
+            for item in items:
+                row_index = item.row_index
+                seen.add(row_index)
+                cells = item.cells
+                raw = "\n".join(cells[position] if position < len(cells) else "" for position in SEARCH_POSITIONS)
+                if raw_texts.get(row_index) == raw:
+                    continue
+                if row_index in raw_texts:
+                    self._remove(row_index)
+                raw_texts[row_index] = raw
+                self._add(row_index, normalize_search_text(raw))
+            for row_index in [row_index for row_index in raw_texts if row_index not in seen]:
+                self._remove(row_index)
+            for gram in self._dirty:
+                posting = self._postings.get(gram)
+                if posting is not None and len(posting) >= BITMAP_MIN_ROWS:
+                    self._bitmaps[gram] = _to_bitmap(posting)
+            self._dirty.clear()
+            self._source = items
+
+    def _add(self, row_index: int, text: str) -> None:
+        self._texts[row_index] = text
+        postings = self._postings
+        bitmaps = self._bitmaps
+        dirty = self._dirty
+        for gram in trigrams(text):
+            postings[gram].add(row_index)
+            bitmaps.pop(gram, None)
+            dirty.add(gram)
+
+    def _remove(self, row_index: int) -> None:
+        del self._raw[row_index]
+        for gram in trigrams(self._texts.pop(row_index)):
+            posting = self._postings[gram]
+            posting.discard(row_index)
+            if not posting:
+                del self._postings[gram]
+            self._bitmaps.pop(gram, None)
+            self._dirty.add(gram)
+
+    def _bitmap(self, gram: str) -> int:
+        bitmap = self._bitmaps.get(gram)
+        if bitmap is None:
+            posting = self._postings.get(gram)
+            return _to_bitmap(posting) if posting else 0
+        return bitmap
+
+    def search(self, query: str, limit: int) -> list[int]:
+        """Return up to limit row indexes sharing at least MIN_SIMILARITY of the query trigrams.
+
+        Rows sharing more trigrams rank first, ties in sheet order.
+        """
+        text = normalize_search_text(query)
+        if not text:
+            return []
+        grams = trigrams(text)
+        needed = max(1, math.ceil(len(grams) * MIN_SIMILARITY))
+
+        with self._lock:
+            bitmaps = [self._bitmap(gram) for gram in grams]
+
+        # Bit-sliced counters: planes[i] holds bit i of every row's shared trigram count.
+        planes: list[int] = []
+        everything = 0
+        for bitmap in bitmaps:
+            everything |= bitmap
+            carry = bitmap
+            for position, plane in enumerate(planes):
+                if not carry:
+                    break
+                planes[position], carry = plane ^ carry, plane & carry
+            if carry:
+                planes.append(carry)
+
+        rows: list[int] = []
+        for count in range(len(grams), needed - 1, -1):
+            if count >> len(planes):
+                continue
+            matching = everything
+            for position, plane in enumerate(planes):
+                matching &= plane if count >> position & 1 else ~plane
+            while matching and len(rows) < limit:
+                lowest = matching & -matching
+                rows.append(lowest.bit_length() - 1)
+                matching ^= lowest
+            if len(rows) == limit:
+                break
+        return rows
+
+
+def _to_bitmap(rows: set[int]) -> int:
+    bits = bytearray(max(rows) // 8 + 1)
+    for row_index in rows:
+        bits[row_index >> 3] |= 1 << (row_index & 7)
+    return int.from_bytes(bits, "little")
@@ -0,0 +1,125 @@
+import asyncio
+import random
+import threading
+import time
+
+from app.config import config
+from app.metrics import SHEETS_RETRIES, SHEETS_SHED
+from app.storage import INTERACTIVE, StoreBusyError, request_priority
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+BACKGROUND_MAX_WAIT = 60.0
+
+
+class TokenBucket:
+    """Per-minute request budget refilled continuously. Shared by both event loops, so guarded by a lock."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, floor: float = 0.0) -> float:
+        """Take one token if more than floor remain. Returns 0 on success, else seconds until one is available."""
+        with self._lock:
+            self._refill()
+            if self._tokens - 1 >= floor:
+                self._tokens -= 1
+                return 0.0
+            return (floor + 1 - self._tokens) / self.rate
+
+    def drain(self) -> None:
+        """Empty the bucket after the server reported quota exhaustion."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+
+class SheetsScheduler:
+    """Admits Sheets calls against read and write token buckets and retries 429/5xx.
+
+    HTTP errors are recognised by a status_code attribute, as on googleapiclient's HttpError.
+
+    Interactive calls may use the whole budget; background calls leave
+    interactive_reserve of each bucket untouched. A new call that would have
+    to wait longer than max_wait for a token is shed with StoreBusyError;
+    retries of an already admitted call may wait up to backoff_max.
+    """
+
+    def __init__(
+        self,
+        reads_per_minute: float,
+        writes_per_minute: float,
+        interactive_reserve: float,
+        max_wait: float,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float
+    ) -> None:
+        self._buckets = {"read": TokenBucket(reads_per_minute), "write": TokenBucket(writes_per_minute)}
+        self._interactive_reserve = interactive_reserve
+        self._max_wait = max_wait
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+
+    async def run(self, operation: str, kind: str, call):
+        """Await call() once admitted by the kind ("read" or "write") bucket, retrying transient failures."""
+        bucket = self._buckets[kind]
+        for attempt in range(self._max_retries + 1):
+            await self._admit(bucket, kind, retry=attempt > 0)
+            try:
+                return await call()
+            except (ConnectionError, TimeoutError):
+                if attempt == self._max_retries:
+                    raise
+                SHEETS_RETRIES.inc(operation, "connection")
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                if status not in RETRY_STATUSES:
+                    raise
+                if status == 429:
+                    bucket.drain()
+                if attempt == self._max_retries:
+                    raise StoreBusyError(f"Google Sheets answered {status}", self._backoff(attempt)) from e
+                SHEETS_RETRIES.inc(operation, str(status))
+            await asyncio.sleep(self._backoff(attempt))
+
+    async def _admit(self, bucket: TokenBucket, kind: str, retry: bool) -> None:
+        priority = request_priority.get()
+        if priority == INTERACTIVE:
+            floor = 0.0
+            max_wait = max(self._max_wait, self._backoff_max) if retry else self._max_wait
+        else:
+            floor, max_wait = bucket.capacity * self._interactive_reserve, BACKGROUND_MAX_WAIT
+
+        deadline = time.monotonic() + max_wait
+        while (wait := bucket.reserve(floor)) > 0:
+            if time.monotonic() + wait > deadline:
+                SHEETS_SHED.inc(kind, priority)
+                raise StoreBusyError(f"Google Sheets {kind} budget exhausted", wait)
+            await asyncio.sleep(wait)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self._backoff_max, self._backoff_base * 2 ** attempt))
+
+
+def create_scheduler() -> SheetsScheduler:
+    """Create scheduler configured from SHEETS_* settings."""
+    return SheetsScheduler(
+        reads_per_minute=config.SHEETS_READS_PER_MINUTE,
+        writes_per_minute=config.SHEETS_WRITES_PER_MINUTE,
+        interactive_reserve=config.SHEETS_INTERACTIVE_RESERVE,
+        max_wait=config.SHEETS_MAX_WAIT,
+        max_retries=config.SHEETS_MAX_RETRIES,
+        backoff_base=config.SHEETS_BACKOFF_BASE,
+        backoff_max=config.SHEETS_BACKOFF_MAX
+    )
@@ -0,0 +1,54 @@
+import asyncio
+import concurrent.futures
+import threading
+
+from app.metrics import SINGLE_FLIGHT_SHARED
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one in-flight call.
+
+    The result is published through a thread-safe future, so callers on the
+    polling loop and on the uvicorn loop share the same fetch. The call runs
+    in its own task and is not cancelled when the caller that started it is.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, concurrent.futures.Future] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def run(self, key: str, func):
+        """Await func() or, if a call for key is already in flight, its result."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._calls[key] = future
+
+        if leader:
+            task = asyncio.create_task(self._lead(key, future, func))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            SINGLE_FLIGHT_SHARED.inc(key)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def forget(self, key: str) -> None:
+        """Let the next caller start a fresh call instead of joining the one in flight."""
+        with self._lock:
+            self._calls.pop(key, None)
+
+    async def _lead(self, key: str, future: concurrent.futures.Future, func) -> None:
+        try:
+            future.set_result(await func())
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from app.item_row import ItemRow
+from app.items_snapshot import ItemsSnapshot, rows_digest
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+
+class SnapshotFile:
+    """ITEMS snapshot persisted as JSON lines: a header with version stamp, then one [row_index, *cells] per row.
+
+    Saves are atomic (temp file + rename) and run in a background thread;
+    bursts of changes are coalesced so only the latest snapshot is written.
+    Throttled saves start at most once per min_interval seconds.
+    """
+
+    def __init__(self, path: str, source: str, min_interval: float = 0.0) -> None:
+        self.path = path
+        self.min_interval = min_interval
+        self._source = hashlib.blake2b(source.encode(), digest_size=8).hexdigest()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._written_version = -1
+        self._pending: ItemsSnapshot | None = None
+        self._due = 0.0
+        self._saved_at = float("-inf")
+        self._saving = False
+
+    def load(self) -> tuple[int, str, list[ItemRow]] | None:
+        """Return (version, digest, items) or None if file is missing, foreign or damaged."""
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                header = json.loads(file.readline())
+                if header.get("format") != SNAPSHOT_FORMAT or header.get("source") != self._source:
+                    return None
+                items = []
+                for line in file:
+                    row_index, *cells = json.loads(line)
+                    items.append(ItemRow(row_index, tuple(cells)))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("Ignoring unreadable items snapshot %s: %s", self.path, e)
+            return None
+
+        if len(items) != header.get("rows"):
+            logger.warning("Ignoring truncated items snapshot %s", self.path)
+            return None
+        return header["version"], header["digest"], items
+
+    def save(self, snapshot: ItemsSnapshot) -> None:
+        """Write snapshot atomically."""
+        header = {
+            "format": SNAPSHOT_FORMAT,
+            "source": self._source,
+            "version": snapshot.version,
+            "digest": snapshot.digest or rows_digest(snapshot.items),
+            "saved_at": time.time(),
+            "rows": len(snapshot.items),
+        }
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write(json.dumps(header) + "\n")
+            for item in snapshot.items:
+                file.write(json.dumps([item.row_index, *item.cells], ensure_ascii=False) + "\n")
+        os.replace(temporary_path, self.path)
+
+    def save_later(self, snapshot: ItemsSnapshot, throttle: bool = False) -> None:
+        """Queue snapshot for saving in a background thread. Only the latest queued snapshot is written.
+
+        A throttled save waits until min_interval has passed since the previous one;
+        an unthrottled save also flushes any throttled save waiting before it.
+        """
+        with self._lock:
+            due = self._saved_at + self.min_interval if throttle else 0.0
+            self._due = due if self._pending is None else min(self._due, due)
+            self._pending = snapshot
+            if self._saving:
+                self._wake.notify()
+                return
+            self._saving = True
+        threading.Thread(target=self._drain, name="snapshot-save", daemon=True).start()
+
+    def flush(self) -> None:
+        """Write a queued snapshot now instead of waiting for its throttled save."""
+        with self._lock:
+            snapshot, self._pending = self._pending, None
+            self._wake.notify()
+        if snapshot is not None:
+            self._save_logged(snapshot)
+
+    def _drain(self) -> None:
+        while True:
+            with self._lock:
+                while self._pending is not None and self._due > time.monotonic():
+                    self._wake.wait(self._due - time.monotonic())
+                snapshot, self._pending = self._pending, None
+                if snapshot is None:
+                    self._saving = False
+                    return
+                self._saved_at = time.monotonic()
+            self._save_logged(snapshot)
+
+    def _save_logged(self, snapshot: ItemsSnapshot) -> None:
+        # flush() and the background thread may race; never let an older snapshot overwrite a newer one.
+        with self._write_lock:
+            if snapshot.version < self._written_version:
+                return
+            try:
+                self.save(snapshot)
+            except OSError as e:
+                logger.warning("Failed to save items snapshot %s: %s", self.path, e)
+                return
+            self._written_version = snapshot.version
@@ -0,0 +1,87 @@
+import asyncio
+import sqlite3
+import threading
+from collections.abc import Sequence
+
+from app.item_row import COLUMN_LETTERS
+from app.storage import InventoryStore
+
+COLUMN_NAMES = [column.lower() for column in COLUMN_LETTERS]
+
+
+class SqliteInventoryStore(InventoryStore):
+    """ITEMS stand-in backed by a local SQLite table with one TEXT column per sheet column A..X."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        columns_sql = ", ".join(f"{name} TEXT NOT NULL DEFAULT ''" for name in COLUMN_NAMES)
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS items (row_index INTEGER PRIMARY KEY, {columns_sql})"
+            )
+
+    def import_rows(self, rows: list[list[str]]) -> None:
+        """Replace table contents with sheet-shaped rows, row p is stored as row_index p + 1."""
+        placeholders = ", ".join("?" for _ in range(len(COLUMN_NAMES) + 1))
+        records = [
+            (idx + 1, *(row[position] if position < len(row) else "" for position in range(len(COLUMN_NAMES))))
+            for idx, row in enumerate(rows)
+        ]
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM items")
+            self._connection.executemany(f"INSERT INTO items VALUES ({placeholders})", records)
+        self.invalidate_cache()
+
+    def _query(self, sql: str, parameters: Sequence = ()) -> list[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    async def fetch_rows(self) -> list[list[str]]:
+        records = await asyncio.to_thread(
+            self._query, f"SELECT row_index, {', '.join(COLUMN_NAMES)} FROM items ORDER BY row_index"
+        )
+        rows: list[list[str]] = []
+        for row_index, *cells in records:
+            while len(rows) < row_index - 1:
+                rows.append([])
+            rows.append(_trim(cells))
+        return rows
+
+    async def get_columns(self, columns: Sequence[str]) -> dict[str, list[str]]:
+        names = ", ".join(column.lower() for column in columns)
+        records = await asyncio.to_thread(self._query, f"SELECT row_index, {names} FROM items ORDER BY row_index")
+        size = records[-1][0] if records else 0
+        projected = {column: [""] * size for column in columns}
+        for row_index, *cells in records:
+            for column, value in zip(columns, cells):
+                projected[column][row_index - 1] = value
+        return {column: _trim(values) for column, values in projected.items()}
+
+    async def get_row_values(self, row_index: int, first_column: str = "A", last_column: str = "X") -> list[str]:
+        first = COLUMN_LETTERS.index(first_column)
+        last = COLUMN_LETTERS.index(last_column)
+        names = ", ".join(COLUMN_NAMES[first:last + 1])
+        records = await asyncio.to_thread(self._query, f"SELECT {names} FROM items WHERE row_index = ?", (row_index,))
+        return _trim(list(records[0])) if records else []
+
+    async def write_checkboxes(self, updates: dict[int, bool]) -> None:
+        records = [(row_index, "TRUE" if value else "FALSE") for row_index, value in sorted(updates.items())]
+        await asyncio.to_thread(self._write, records)
+
+    def _write(self, records: list[tuple[int, str]]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT INTO items (row_index, t) VALUES (?, ?) "
+                "ON CONFLICT(row_index) DO UPDATE SET t = excluded.t",
+                records
+            )
+
+
+def _trim(cells: list[str]) -> list[str]:
+    """Drop trailing empty cells like the Sheets API does."""
+    cells = list(cells)
+    while cells and cells[-1] == "":
+        cells.pop()
+    return cells
@@ -0,0 +1,56 @@
+from app.item_row import ItemRow
+
+
+class StockStats:
+    """Checked / total counts of ITEMS rows per storage location (column V).
+
+    Built once per full snapshot and then patched per column T change, so
+    reading it never scans rows. version is the snapshot version it matches.
+    """
+
+    __slots__ = ("version", "checked", "total", "_locations")
+
+    def __init__(self, version: int) -> None:
+        self.version = version
+        self.checked = 0
+        self.total = 0
+        self._locations: dict[str, list[int]] = {}
+
+    @classmethod
+    def from_items(cls, version: int, items: list[ItemRow]) -> "StockStats":
+        stats = cls(version)
+        locations = stats._locations
+        for item in items:
+            if not item.inventory_id:
+                continue
+            counts = locations.get(location := item.cell("V").strip())
+            if counts is None:
+                counts = locations[location] = [0, 0]
+            checked = item.checkbox_t
+            counts[0] += checked
+            counts[1] += 1
+            stats.checked += checked
+            stats.total += 1
+        return stats
+
+    def set_checked(self, item: ItemRow, value: bool) -> None:
+        """Account for item's column T changing to value."""
+        if not item.inventory_id or item.checkbox_t == value:
+            return
+        delta = 1 if value else -1
+        self._locations[item.cell("V").strip()][0] += delta
+        self.checked += delta
+
+    def to_dict(self) -> dict:
+        """Return stats in API shape: overall counts, progress and per-location counts sorted by location."""
+        return {
+            "version": self.version,
+            "total": self.total,
+            "checked": self.checked,
+            "unchecked": self.total - self.checked,
+            "progress": round(self.checked / self.total, 4) if self.total else 0.0,
+            "locations": [
+                {"location": location, "total": total, "checked": checked, "unchecked": total - checked}
+                for location, (checked, total) in sorted(self._locations.items())
+            ]
+        }
@@ -0,0 +1,532 @@
+import asyncio
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+
+from app.config import config
+from app.item_row import INVENTORY_ID_COLUMN, ItemRow
+from app.items_index import IndexEntry, ItemsIndex, normalize_inventory_id
+from app.items_snapshot import ItemsSnapshot, rows_digest
+from app.journal import WriteJournal
+from app.metrics import CACHE_REQUESTS, CHANGE_CHECKS, ITEMS_FETCH_ROWS, ITEMS_PARSE_SECONDS
+from app.prefix_index import PrefixIndex
+from app.search_index import SearchIndex
+from app.single_flight import SingleFlight
+from app.snapshot_file import SnapshotFile
+from app.stock_stats import StockStats
+
+INDEX_COLUMNS = ("K", "B", "V", "T")
+FINGERPRINT_COLUMNS = ("K", "T")
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+logger = logging.getLogger(__name__)
+
+request_priority: contextvars.ContextVar[str] = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def background_priority():
+    """Mark backend calls made inside the block as background refreshes."""
+    token = request_priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class StoreUnavailableError(Exception):
+    """Inventory backend failed to serve a request."""
+
+
+class StoreBusyError(StoreUnavailableError):
+    """Backend request budget is exhausted; retry_after is a hint in seconds."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class InventoryStore(ABC):
+    """Inventory data access used by the API and the bot.
+
+    Backends implement raw reads and the column T write; lookup index,
+    snapshot caching and cache maintenance after writes are shared here.
+    """
+
+    def __init__(self) -> None:
+        self._index = ItemsIndex(ttl=config.ITEMS_CACHE_TTL)
+        self._snapshot: ItemsSnapshot | None = None
+        self._snapshot_version = 0
+        self._snapshot_lock = threading.Lock()
+        self._single_flight = SingleFlight()
+        self._search = SearchIndex()
+        self._prefixes = PrefixIndex()
+        self._stats: StockStats | None = None
+        self.snapshot_file: SnapshotFile | None = None
+        self.journal: WriteJournal | None = None
+
+    @abstractmethod
+    async def fetch_rows(self) -> list[list[str]]:
+        """Read every ITEMS row. Trailing empty cells may be omitted."""
+
+    @abstractmethod
+    async def get_columns(self, columns: Sequence[str]) -> dict[str, list[str]]:
+        """Read only given columns. Returns column letter -> cells by row."""
+
+    @abstractmethod
+    async def get_row_values(self, row_index: int, first_column: str = "A", last_column: str = "X") -> list[str]:
+        """Read cells of one known row. Trailing empty cells may be omitted."""
+
+    @abstractmethod
+    async def write_checkboxes(self, updates: dict[int, bool]) -> None:
+        """Write column T values for given rows in one backend call."""
+
+    async def close(self) -> None:
+        """Release backend resources bound to the running event loop."""
+
+    async def get_all_items(self) -> list[ItemRow]:
+        """Get all rows with column K as compact ItemRow records."""
+        rows = await self.fetch_rows()
+        ITEMS_FETCH_ROWS.observe(len(rows))
+        with ITEMS_PARSE_SECONDS.time():
+            return [
+                ItemRow(idx + 1, tuple(row))
+                for idx, row in enumerate(rows)
+                if len(row) > INVENTORY_ID_COLUMN
+            ]
+
+    async def get_items_snapshot(self) -> ItemsSnapshot:
+        """Return cached full ITEMS snapshot, re-reading the backend after TTL.
+
+        Concurrent callers share one in-flight reload.
+        Version is bumped only when reloaded content differs or after a local write.
+        """
+        snapshot = self.cached_items_snapshot()
+        if snapshot is not None:
+            CACHE_REQUESTS.inc("snapshot", "hit")
+            return snapshot
+
+        CACHE_REQUESTS.inc("snapshot", "miss")
+        return await self._single_flight.run("snapshot", self._load_snapshot)
+
+    async def _load_snapshot(self) -> ItemsSnapshot:
+        current = self._snapshot
+        if current is not None and current.full_load_age() < config.ITEMS_FULL_RELOAD_INTERVAL:
+            snapshot = await self._check_snapshot(current)
+            if snapshot is not None:
+                return snapshot
+
+        items = await self.get_all_items()
+        digest = rows_digest(items)
+        with self._snapshot_lock:
+            current = self._snapshot
+            if current is not None and current.digest == digest:
+                current.loaded_at = current.full_loaded_at = time.monotonic()
+                return current
+            self._snapshot_version += 1
+            snapshot = ItemsSnapshot(self._snapshot_version, items, digest)
+            self._snapshot = snapshot
+        self._persist(snapshot)
+        return snapshot
+
+    async def _check_snapshot(self, current: ItemsSnapshot) -> ItemsSnapshot | None:
+        """Re-read only K and T; patch column T changes into the snapshot.
+
+        Returns None if inventory_ids changed and a full reload is needed.
+        """
+        columns = await self.get_columns(FINGERPRINT_COLUMNS)
+        changes = current.checkbox_changes(columns["K"], columns["T"])
+        if changes is None:
+            CHANGE_CHECKS.inc("snapshot", "reload")
+            return None
+
+        with self._snapshot_lock:
+            if self._snapshot is not current:
+                return self._snapshot
+            if not changes:
+                CHANGE_CHECKS.inc("snapshot", "unchanged")
+                current.loaded_at = time.monotonic()
+                return current
+            self._snapshot_version += 1
+            self._carry_stats(current, self._snapshot_version, changes)
+            snapshot = current.with_checkboxes(self._snapshot_version, changes)
+            snapshot.loaded_at = time.monotonic()
+            self._snapshot = snapshot
+        CHANGE_CHECKS.inc("snapshot", "patched")
+        self._persist(snapshot, throttle=True)
+        return snapshot
+
+    def restore_snapshot(self) -> bool:
+        """Load persisted snapshot and index from snapshot_file, fresh for one TTL.
+
+        The first refresh after a restore re-reads everything, not just K and T.
+
+        Returns False if there is no usable file or data is already loaded.
+        """
+        if self.snapshot_file is None:
+            return False
+        restored = self.snapshot_file.load()
+        if restored is None:
+            return False
+
+        version, digest, items = restored
+        with self._snapshot_lock:
+            if self._snapshot is not None:
+                return False
+            self._snapshot_version = version
+            self._snapshot = ItemsSnapshot(version, items, digest, full_loaded_at=float("-inf"))
+        self._index.load(index_columns(items), verified=False)
+        return True
+
+    async def refresh(self) -> ItemsSnapshot:
+        """Re-read snapshot and index from the backend regardless of TTL, at background priority."""
+        with background_priority():
+            self._single_flight.forget("snapshot")
+            self._single_flight.forget("index")
+            snapshot, _ = await asyncio.gather(
+                self._single_flight.run("snapshot", self._load_snapshot),
+                self._single_flight.run("index", self._load_index)
+            )
+        return snapshot
+
+    def has_items_snapshot(self) -> bool:
+        """True once a snapshot was loaded or restored, fresh or not."""
+        return self._snapshot is not None
+
+    def cached_items_snapshot(self) -> ItemsSnapshot | None:
+        """Return snapshot if it is still fresh, without any backend call."""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.is_fresh(config.ITEMS_CACHE_TTL):
+            return snapshot
+        return None
+
+    async def search_items(self, query: str, limit: int) -> list[ItemRow]:
+        """Rank items whose equipment name (B) or storage location (V) resembles query.
+
+        Served from the cached snapshot and its trigram index, no backend call while it is fresh.
+        """
+        snapshot = await self.get_items_snapshot()
+        if not self._search.is_synced(snapshot.source_items):
+            await asyncio.to_thread(self._search.sync, snapshot.source_items)
+        items = (snapshot.item_at(row_index) for row_index in self._search.search(query, limit))
+        return [item for item in items if item is not None]
+
+    async def complete_inventory_ids(self, prefix: str, limit: int) -> list[ItemRow]:
+        """Return items whose inventory_id starts with prefix (case-insensitive), in inventory_id order.
+
+        Served from the cached snapshot and a sorted column K array, no backend call while it is fresh.
+        """
+        snapshot = await self.get_items_snapshot()
+        if not self._prefixes.is_synced(snapshot.source_items):
+            await asyncio.to_thread(self._prefixes.sync, snapshot.source_items)
+        items = (snapshot.item_at(row_index) for row_index in self._prefixes.complete(prefix, limit))
+        return [item for item in items if item is not None]
+
+    async def get_item_by_row(self, row_index: int) -> ItemRow | None:
+        """Fetch full A..X item for a known row. Returns None if row has no column K."""
+        row = await self.get_row_values(row_index)
+        if len(row) > INVENTORY_ID_COLUMN:
+            return ItemRow(row_index, tuple(row))
+        return None
+
+    async def lookup_inventory_id(self, inventory_id: str) -> IndexEntry | None:
+        """Find inventory_id in cached K/B/V/T index. No backend call while index is fresh."""
+        await self._ensure_index()
+        return self._index.get(inventory_id)
+
+    async def lookup_inventory_ids(self, inventory_ids: Sequence[str]) -> list[IndexEntry | None]:
+        """Resolve many inventory_ids against one index snapshot. Result is aligned with input."""
+        await self._ensure_index()
+        return [self._index.get(inventory_id) for inventory_id in inventory_ids]
+
+    async def _ensure_index(self) -> None:
+        if self._index.is_fresh():
+            CACHE_REQUESTS.inc("index", "hit")
+            return
+        CACHE_REQUESTS.inc("index", "miss")
+        await self._single_flight.run("index", self._load_index)
+
+    async def _load_index(self) -> None:
+        age = self._index.full_load_age()
+        if age is not None and age < config.ITEMS_FULL_RELOAD_INTERVAL:
+            columns = await self.get_columns(FINGERPRINT_COLUMNS)
+            if self._index.apply_fingerprint(columns["K"], columns["T"]):
+                CHANGE_CHECKS.inc("index", "patched")
+                return
+            CHANGE_CHECKS.inc("index", "reload")
+        self._index.load(await self.get_columns(INDEX_COLUMNS))
+
+    async def find_item_by_inventory_id(self, inventory_id: str) -> ItemRow | None:
+        """Find item by inventory_id in column K and fetch its full row. Returns None if not found."""
+        entry = await self.lookup_inventory_id(inventory_id)
+        if entry is None:
+            return None
+
+        item = await self.get_item_by_row(entry.row_index)
+        if item is not None and normalize_inventory_id(item.inventory_id) == normalize_inventory_id(entry.inventory_id):
+            return item
+
+        self._invalidate_index()
+        entry = await self.lookup_inventory_id(inventory_id)
+        if entry is None:
+            return None
+        return await self.get_item_by_row(entry.row_index)
+
+    async def verify_row(self, inventory_id: str, row_hint: int) -> int | None:
+        """Confirm inventory_id is still in row_hint with a one-cell K read.
+
+        If rows were inserted or sorted since, relocate it through a reloaded index.
+        Returns the current row or None if inventory_id is gone.
+        """
+        key = normalize_inventory_id(inventory_id)
+        if row_hint >= 1:
+            cells = await self.get_row_values(row_hint, "K", "K")
+            if cells and normalize_inventory_id(cells[0]) == key:
+                return row_hint
+
+        self._invalidate_index()
+        entry = await self.lookup_inventory_id(inventory_id)
+        return None if entry is None else entry.row_index
+
+    async def verify_rows(self, row_hints: dict[str, int]) -> dict[str, int | None]:
+        """Confirm many inventory_id -> row hints with one read of column K, relocating stale ones in it."""
+        ids = (await self.get_columns(("K",)))["K"]
+        positions: dict[str, int] | None = None
+        rows: dict[str, int | None] = {}
+        for inventory_id, row_hint in row_hints.items():
+            key = normalize_inventory_id(inventory_id)
+            if 1 <= row_hint <= len(ids) and normalize_inventory_id(ids[row_hint - 1]) == key:
+                rows[inventory_id] = row_hint
+                continue
+            if positions is None:
+                positions = {}
+                for position, value in enumerate(ids):
+                    positions.setdefault(normalize_inventory_id(value), position + 1)
+                self._invalidate_index()
+            rows[inventory_id] = positions.get(key) if key else None
+        return rows
+
+    def invalidate_cache(self) -> None:
+        """Drop cached index and snapshot freshness so the next read re-reads the backend."""
+        self._invalidate_index()
+        self._single_flight.forget("snapshot")
+        with self._snapshot_lock:
+            if self._snapshot is not None:
+                self._snapshot.expire()
+
+    def _invalidate_index(self) -> None:
+        """Drop index freshness; callers after this do not join a fetch started before it."""
+        self._index.invalidate()
+        self._single_flight.forget("index")
+
+    async def update_checkbox(self, row_index: int, value: bool, inventory_id: str = "") -> bool:
+        """Update column T (checkbox) for given row. Returns success status."""
+        return await self.batch_update_checkboxes({row_index: value}, {row_index: inventory_id})
+
+    async def batch_update_checkboxes(self, updates: dict[int, bool], inventory_ids: dict[int, str] | None = None) -> bool:
+        """Update column T for many rows in one backend write and patch caches.
+
+        With a journal attached, rows are journaled first; inventory_ids (row -> id) go into the records.
+        """
+        if not updates:
+            return True
+        seqs = await self.journal_checkboxes(updates, inventory_ids or {})
+        await self.write_journaled(updates, seqs)
+        return True
+
+    async def journal_checkboxes(self, updates: dict[int, bool], inventory_ids: dict[int, str]) -> list[int]:
+        """Durably record column T writes before they are sent. Returns journal seqs, [] without a journal."""
+        if self.journal is None:
+            return []
+        return await self.journal.record(updates, inventory_ids)
+
+    async def write_journaled(self, updates: dict[int, bool], seqs: list[int]) -> None:
+        """Write column T, patch caches and confirm journal seqs. On failure the seqs are released for replay."""
+        try:
+            await self.write_checkboxes(updates)
+        except BaseException:
+            if self.journal is not None:
+                self.journal.release(seqs)
+            raise
+        self._apply_checkboxes(updates)
+        if self.journal is not None:
+            self.journal.mark_done(seqs)
+
+    async def replay_journal(self) -> int:
+        """Write journaled column T changes the backend never confirmed, one row per call at background priority.
+
+        Rows with a live write in flight are skipped; each record is claimed in the journal
+        right before its write. Rows are re-verified by inventory_id first; records whose item
+        is gone are dropped, and records the backend rejects with a 4xx status are retired.
+        Any other failure ends the round, the remaining records are retried on the next one.
+        Returns the number of rows written.
+        """
+        if self.journal is None:
+            return 0
+        records = self.journal.pending()
+        if not records:
+            return 0
+
+        written = 0
+        with background_priority():
+            hints = {record["inventory_id"]: record["row"] for record in records if record["inventory_id"]}
+            rows = await self.verify_rows(hints) if hints else {}
+            for record in records:
+                seq, journal_row, value = record["seq"], record["row"], record["value"]
+                if not self.journal.claim(seq, journal_row):
+                    continue
+                row_index = rows.get(record["inventory_id"]) if record["inventory_id"] else journal_row
+                if row_index is None:
+                    self.journal.finish_replay(seq, journal_row)
+                    continue
+                try:
+                    await self.write_checkboxes({row_index: value})
+                except Exception as e:
+                    status = getattr(e, "status_code", None)
+                    if not is_rejected_status(status):
+                        self.journal.release([seq])
+                        raise
+                    logger.warning(
+                        "Retiring journaled checkbox write seq=%d row=%d: backend answered %d",
+                        seq, row_index, status
+                    )
+                    self.journal.retire(seq, journal_row, status)
+                    continue
+                except BaseException:
+                    self.journal.release([seq])
+                    raise
+                self._apply_checkboxes({row_index: value})
+                self.journal.finish_replay(seq, journal_row)
+                written += 1
+        return written
+
+    def _apply_checkboxes(self, updates: dict[int, bool]) -> None:
+        """Patch cached index and snapshot after a successful column T write."""
+        for row_index, value in updates.items():
+            if not self._index.set_checkbox(row_index, value):
+                self._invalidate_index()
+                break
+        with self._snapshot_lock:
+            if self._snapshot is None:
+                return
+            self._snapshot_version += 1
+            self._carry_stats(self._snapshot, self._snapshot_version, updates)
+            snapshot = self._snapshot.with_checkboxes(self._snapshot_version, updates)
+            self._snapshot = snapshot
+        self._persist(snapshot, throttle=True)
+
+    def _carry_stats(self, current: ItemsSnapshot, version: int, updates: dict[int, bool]) -> None:
+        """Patch stock stats of current snapshot into stats of its column T update. Call under snapshot lock."""
+        stats = self._stats
+        if stats is None or stats.version != current.version:
+            return
+        for row_index, value in updates.items():
+            item = current.item_at(row_index)
+            if item is not None:
+                stats.set_checked(item, value)
+        stats.version = version
+
+    async def get_stock_stats(self) -> dict:
+        """Checked/unchecked counts per storage location for the current snapshot.
+
+        Counted once per full reload; column T changes patch the counts in place.
+        """
+        snapshot = await self.get_items_snapshot()
+        with self._snapshot_lock:
+            stats = self._stats
+            if stats is not None and stats.version == snapshot.version:
+                return stats.to_dict()
+        stats = await asyncio.to_thread(StockStats.from_items, snapshot.version, snapshot.items)
+        with self._snapshot_lock:
+            if self._snapshot is snapshot:
+                self._stats = stats
+            return stats.to_dict()
+
+    def _persist(self, snapshot: ItemsSnapshot, throttle: bool = False) -> None:
+        """Save snapshot to snapshot_file. Column T patches are throttled: each save rewrites the whole file."""
+        if self.snapshot_file is not None:
+            self.snapshot_file.save_later(snapshot, throttle=throttle)
+
+
+def index_columns(items: list[ItemRow]) -> dict[str, list[str]]:
+    """Project K/B/V/T columns out of full rows, in the shape returned by get_columns."""
+    size = items[-1].row_index if items else 0
+    columns = {column: [""] * size for column in INDEX_COLUMNS}
+    for item in items:
+        position = item.row_index - 1
+        for column in INDEX_COLUMNS:
+            columns[column][position] = item.cell(column)
+    return columns
+
+
+def contiguous_row_ranges(updates: dict[int, bool]) -> list[tuple[int, list[bool]]]:
+    """Group row -> value updates into (first_row, values) runs of consecutive rows."""
+    runs: list[tuple[int, list[bool]]] = []
+    previous_row = None
+    for row_index in sorted(updates):
+        if previous_row is not None and row_index == previous_row + 1:
+            runs[-1][1].append(updates[row_index])
+        else:
+            runs.append((row_index, [updates[row_index]]))
+        previous_row = row_index
+    return runs
+
+
+def is_rejected_status(status: int | None) -> bool:
+    """True for HTTP statuses that will not succeed on retry: 4xx other than 429."""
+    return status is not None and 400 <= status < 500 and status != 429
+
+
+inventory_store: InventoryStore | None = None
+
+
+def create_store(backend: str) -> InventoryStore:
+    """Create inventory store for backend name: sheets, sheets_async, memory or sqlite."""
+    if backend in ("sheets", "sheets_async"):
+        if backend == "sheets":
+            from app.google_sheets import get_sheets_client
+            store = get_sheets_client()
+        else:
+            from app.async_sheets import AsyncSheetsClient
+            store = AsyncSheetsClient()
+        if config.ITEMS_SNAPSHOT_PATH:
+            store.snapshot_file = SnapshotFile(
+                config.ITEMS_SNAPSHOT_PATH,
+                source=store.spreadsheet_id,
+                min_interval=config.ITEMS_SNAPSHOT_SAVE_INTERVAL
+            )
+        if config.WRITE_JOURNAL_PATH:
+            store.journal = WriteJournal(config.WRITE_JOURNAL_PATH, compact_after=config.JOURNAL_COMPACT_RECORDS)
+        return store
+    if backend == "memory":
+        from app.memory_store import InMemoryInventoryStore, make_synthetic_rows
+        return InMemoryInventoryStore(
+            make_synthetic_rows(config.MEMORY_STORE_ROWS),
+            latency=config.MEMORY_STORE_LATENCY,
+            error_rate=config.MEMORY_STORE_ERROR_RATE
+        )
+    if backend == "sqlite":
+        from app.sqlite_store import SqliteInventoryStore
+        return SqliteInventoryStore(config.SQLITE_STORE_PATH)
+    raise ValueError(f"Unknown INVENTORY_BACKEND: {backend}")
+
+
+def get_store() -> InventoryStore:
+    """Get or create singleton inventory store selected by INVENTORY_BACKEND."""
+    global inventory_store
+    if inventory_store is None:
+        inventory_store = create_store(config.INVENTORY_BACKEND)
+    return inventory_store
+
+
+async def close_store() -> None:
+    """Close the inventory store's resources for the running event loop and write any throttled snapshot save."""
+    if inventory_store is not None:
+        await inventory_store.close()
+        if inventory_store.snapshot_file is not None:
+            await asyncio.to_thread(inventory_store.snapshot_file.flush)
@@ -0,0 +1,71 @@
+import functools
+import gzip
+import hashlib
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+WEBAPP_DIR = Path(__file__).parent / "webapp"
+BASE_URL_PLACEHOLDER = "BASE_URL_PLACEHOLDER"
+WEBAPP_CACHE_CONTROL = "public, max-age=300"
+
+
+class RenderedAsset:
+    """WebApp page rendered once for a base URL, with precompressed variants."""
+
+    __slots__ = ("body", "etag", "variants")
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.etag = f'"{digest}"'
+        self.variants: dict[str, tuple[bytes, str]] = {
+            "gzip": (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gzip"')
+        }
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body), f'"{digest}-br"')
+
+    def select(self, accept_encoding: str) -> tuple[bytes, str, str | None]:
+        """Return (body, etag, content encoding) best matching Accept-Encoding header."""
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self.variants:
+                body, etag = self.variants[encoding]
+                return body, etag, encoding
+        return self.body, self.etag, None
+
+
+@functools.cache
+def load_template(name: str) -> str:
+    """Read WebApp HTML template from app/webapp."""
+    return (WEBAPP_DIR / name).read_text(encoding="utf-8")
+
+
+@functools.lru_cache(maxsize=32)
+def render_webapp(name: str, base_url: str) -> RenderedAsset:
+    """Render template for base_url once and keep encoded bytes in memory."""
+    html = load_template(name).replace(BASE_URL_PLACEHOLDER, base_url)
+    return RenderedAsset(html.encode("utf-8"))
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding)
+    if "*" in accepted:
+        accepted.update(("br", "gzip"))
+    return accepted
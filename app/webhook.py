@@ -0,0 +1,146 @@
+import asyncio
+import importlib
+import logging
+
+from app.config import config
+from app.metrics import WEBHOOK_BUSY_WORKERS, WEBHOOK_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookWorkerPool:
+    """Bounded queue of Telegram updates drained by a fixed pool of worker tasks."""
+
+    def __init__(self, handler, workers: int, max_size: int) -> None:
+        self._handler = handler
+        self._workers = workers
+        self._max_size = max_size
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._busy = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+
+    async def start(self) -> None:
+        """Create queue on the running loop and spawn workers."""
+        self._queue = asyncio.Queue(maxsize=self._max_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"webhook-worker-{number}")
+            for number in range(self._workers)
+        ]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Let workers drain queued updates for up to timeout seconds, then cancel them."""
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Dropping %d queued Telegram updates on shutdown", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._queue is not None:
+            WEBHOOK_QUEUE_DEPTH.dec(amount=self._queue.qsize())
+        self._queue = None
+
+    def submit(self, update_data: dict) -> bool:
+        """Queue update without waiting. Returns False if pool is not running or queue is full."""
+        if self._queue is None:
+            self.rejected += 1
+            return False
+        try:
+            self._queue.put_nowait(update_data)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.accepted += 1
+        WEBHOOK_QUEUE_DEPTH.inc()
+        return True
+
+    def stats(self) -> dict:
+        """Return queue depth, worker utilisation and counters."""
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_size": self._max_size,
+            "workers": self._workers,
+            "busy_workers": self._busy,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            update_data = await queue.get()
+            WEBHOOK_QUEUE_DEPTH.dec()
+            WEBHOOK_BUSY_WORKERS.inc()
+            self._busy += 1
+            try:
+                await self._handler(update_data)
+                self.processed += 1
+            except Exception:
+                self.failed += 1
+                logger.exception("Failed to process Telegram update")
+            finally:
+                self._busy -= 1
+                WEBHOOK_BUSY_WORKERS.dec()
+                queue.task_done()
+
+
+webhook_pool: WebhookWorkerPool | None = None
+bot_import: asyncio.Future | None = None
+
+
+async def import_bot():
+    """Import app.bot (and aiogram) in a thread so the API keeps serving meanwhile. Returns the module."""
+    global bot_import
+    if bot_import is None:
+        bot_import = asyncio.ensure_future(asyncio.to_thread(importlib.import_module, "app.bot"))
+    return await asyncio.shield(bot_import)
+
+
+async def process_update(update_data: dict) -> None:
+    bot_module = await import_bot()
+    await bot_module.process_webhook_update(update_data)
+
+
+def get_webhook_pool() -> WebhookWorkerPool:
+    """Get or create singleton webhook worker pool."""
+    global webhook_pool
+    if webhook_pool is None:
+        webhook_pool = WebhookWorkerPool(
+            process_update,
+            workers=config.WEBHOOK_WORKERS,
+            max_size=config.WEBHOOK_QUEUE_SIZE
+        )
+    return webhook_pool
+
+
+async def start_webhook() -> WebhookWorkerPool:
+    """Start worker pool; the bot is imported and the webhook registered by register_webhook()."""
+    pool = get_webhook_pool()
+    await pool.start()
+    return pool
+
+
+async def register_webhook() -> None:
+    """Import the bot off the event loop and register webhook URL with Telegram when public URL is known."""
+    bot_module = await import_bot()
+
+    webhook_url = config.get_webhook_url()
+    if webhook_url:
+        try:
+            await bot_module.get_bot().set_webhook(
+                webhook_url,
+                max_connections=min(config.WEBHOOK_WORKERS, 100),
+                allowed_updates=bot_module.get_dispatcher().resolve_used_update_types()
+            )
+        except Exception:
+            logger.exception("Failed to register Telegram webhook")
+    else:
+        logger.warning("Webhook secret set but no public URL configured, webhook is not registered")
@@ -0,0 +1,97 @@
+import asyncio
+import weakref
+
+from app.config import config
+from app.metrics import WRITE_QUEUE_PENDING
+from app.storage import get_store
+
+
+class CheckboxWriteQueue:
+    """Write-behind queue that coalesces column T updates into one values.batchUpdate.
+
+    Each submitted write is journaled by journal_func before it is queued;
+    flush_func receives merged updates and the journal seqs they cover.
+    """
+
+    def __init__(self, flush_func, window: float, journal_func=None) -> None:
+        self._flush_func = flush_func
+        self._journal_func = journal_func
+        self._window = window
+        self._pending: dict[int, tuple[bool, list[asyncio.Future], list[int]]] = {}
+        self._flush_task: asyncio.Task | None = None
+
+    async def submit(self, row_index: int, value: bool, inventory_id: str = "") -> bool:
+        """Journal and queue column T write. Returns True once the row is written.
+
+        Repeated writes to the same row within one window are merged, last value wins.
+        """
+        seqs = []
+        if self._journal_func is not None:
+            seqs = await self._journal_func({row_index: value}, {row_index: inventory_id})
+        return await self._enqueue(row_index, value, seqs)
+
+    def _enqueue(self, row_index: int, value: bool, seqs: list[int]) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if row_index not in self._pending:
+            WRITE_QUEUE_PENDING.inc()
+        _, futures, pending_seqs = self._pending.get(row_index, (value, [], []))
+        futures.append(future)
+        pending_seqs.extend(seqs)
+        self._pending[row_index] = (value, futures, pending_seqs)
+        if self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush_later())
+        return future
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._window)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write all pending updates now."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        WRITE_QUEUE_PENDING.dec(amount=len(pending))
+
+        updates = {row_index: value for row_index, (value, _, _) in pending.items()}
+        seqs = [seq for _, _, row_seqs in pending.values() for seq in row_seqs]
+        try:
+            await self._flush_func(updates, seqs)
+        except Exception as e:
+            for _, futures, _ in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for _, futures, _ in pending.values():
+            for future in futures:
+                if not future.done():
+                    future.set_result(True)
+
+
+async def _journal_to_store(updates: dict[int, bool], inventory_ids: dict[int, str]) -> list[int]:
+    return await get_store().journal_checkboxes(updates, inventory_ids)
+
+
+async def _flush_to_store(updates: dict[int, bool], seqs: list[int]) -> None:
+    await get_store().write_journaled(updates, seqs)
+
+
+write_queues: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, CheckboxWriteQueue]" = weakref.WeakKeyDictionary()
+
+
+def get_write_queue() -> CheckboxWriteQueue:
+    """Get or create write queue for the running event loop."""
+    loop = asyncio.get_running_loop()
+    queue = write_queues.get(loop)
+    if queue is None:
+        queue = CheckboxWriteQueue(_flush_to_store, window=config.WRITE_BATCH_WINDOW, journal_func=_journal_to_store)
+        write_queues[loop] = queue
+    return queue
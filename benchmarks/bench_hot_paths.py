@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Offline benchmark of API and bot hot paths against an in-memory ITEMS backend.
+
+Drives concurrent load through the ASGI app and Dispatcher.feed_update with
+simulated Sheets round-trip latency and reports latency percentiles,
+throughput, backend calls per operation and peak RSS.
+
+Usage: python benchmarks/bench_hot_paths.py [--sizes 1000,10000,100000]
+       [--latency 0.1] [--requests 300] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:BENCHMARK")
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from app import bot as bot_module
+from app import storage
+from app.main import app
+from app.memory_store import InMemoryInventoryStore, make_synthetic_rows
+
+CHAT = Chat(id=1, type="private")
+USER = User(id=1, is_bot=False, first_name="bench")
+
+
+class OfflineSession(BaseSession):
+    """Telegram session that answers every method locally."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._message_ids = itertools.count(1)
+
+    async def make_request(self, bot, method, timeout=None):
+        if "Message" in str(method.__returning__):
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.datetime.now(),
+                chat=CHAT,
+                text=getattr(method, "text", "") or ""
+            )
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+async def asgi_request(method: str, path: str, body: dict | None = None) -> int:
+    """Send one request through the ASGI app in-process. Returns status code."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+    received = False
+    status = 0
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.sleep(3600)
+        received = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+def message_update(update_id: int, text: str) -> Update:
+    return Update(
+        update_id=update_id,
+        message=Message(message_id=update_id, date=datetime.datetime.now(), chat=CHAT, from_user=USER, text=text)
+    )
+
+
+def callback_update(update_id: int, data: str) -> Update:
+    card = Message(message_id=update_id, date=datetime.datetime.now(), chat=CHAT, text="card")
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(id=str(update_id), from_user=USER, chat_instance="bench", data=data, message=card)
+    )
+
+
+async def run_scenario(name: str, operation, store: InMemoryInventoryStore, requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    failures = 0
+    counter = itertools.count()
+    calls_before = sum(store.calls.values())
+
+    async def worker():
+        nonlocal failures
+        while (number := next(counter)) < requests:
+            started = time.perf_counter()
+            try:
+                ok = await operation(number)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "scenario": name,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "rps": requests / elapsed,
+        "calls_per_op": (sum(store.calls.values()) - calls_before) / requests,
+        "failures": failures,
+    }
+
+
+async def bench_size(size: int, args: argparse.Namespace) -> list[dict]:
+    store = InMemoryInventoryStore(make_synthetic_rows(size), latency=args.latency, seed=size)
+    storage.inventory_store = store
+    bot = Bot(token=os.environ["TELEGRAM_BOT_TOKEN"], session=OfflineSession())
+    dispatcher = bot_module.get_dispatcher()
+    generator = random.Random(size)
+    update_ids = itertools.count(1)
+
+    def random_id() -> str:
+        return f"INV{generator.randint(1, size):06d}"
+
+    async def get_item(_):
+        return await asgi_request("GET", f"/items/{random_id()}") == 200
+
+    async def check_item(_):
+        return await asgi_request("POST", "/items/check", {"inventory_id": random_id()}) == 200
+
+    async def list_items(_):
+        store.invalidate_cache()
+        return await asgi_request("GET", "/items?limit=100") == 200
+
+    async def bot_message(_):
+        await dispatcher.feed_update(bot, message_update(next(update_ids), random_id()))
+        return True
+
+    async def bot_mark(_):
+        row_index = generator.randint(1, size)
+        callback_data = bot_module.mark_callback_data(f"INV{row_index:06d}", row_index)
+        await dispatcher.feed_update(bot, callback_update(next(update_ids), callback_data))
+        return True
+
+    scenarios = [
+        ("GET /items/{id}", get_item, args.requests),
+        ("POST /items/check", check_item, args.requests),
+        ("GET /items (cold)", list_items, max(args.requests // 10, 10)),
+        ("bot handle_message", bot_message, args.requests),
+        ("bot handle_mark_callback", bot_mark, args.requests),
+    ]
+    results = []
+    for name, operation, requests in scenarios:
+        result = await run_scenario(name, operation, store, requests, args.concurrency)
+        result["rows"] = size
+        results.append(result)
+    await bot.session.close()
+    return results
+
+
+def peak_rss_mib() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--latency", type=float, default=0.1, help="simulated backend round trip, seconds")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args()
+
+    print(f"latency={args.latency * 1000:.0f} ms requests={args.requests} concurrency={args.concurrency}")
+    header = f"{'rows':>7}  {'scenario':<26} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rps':>8} {'calls/op':>9} {'fail':>5} {'peak RSS MiB':>13}"
+    if not args.json:
+        print(header)
+    for size in (int(value) for value in args.sizes.split(",")):
+        for result in asyncio.run(bench_size(size, args)):
+            result["peak_rss_mib"] = peak_rss_mib()
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(
+                    f"{result['rows']:>7}  {result['scenario']:<26} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                    f"{result['p99_ms']:>8.1f} {result['rps']:>8.1f} {result['calls_per_op']:>9.3f} "
+                    f"{result['failures']:>5} {result['peak_rss_mib']:>13.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
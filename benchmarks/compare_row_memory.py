@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Compare memory and build time of legacy dict-of-dicts rows vs compact ItemRow records.
+
+Usage: python benchmarks/compare_row_memory.py [--rows 50000]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.item_row import COLUMN_LETTERS, INVENTORY_ID_COLUMN, ItemRow
+
+
+def make_rows(count: int) -> list[list[str]]:
+    """Build synthetic ITEMS values as returned by values.get."""
+    rows = []
+    for idx in range(count):
+        row = [f"{column}{idx + 1}-value" for column in COLUMN_LETTERS]
+        row[1] = f"Equipment {idx % 500} model {idx}"
+        row[INVENTORY_ID_COLUMN] = f"INV{idx + 1:06d}"
+        row[19] = "TRUE" if idx % 3 == 0 else "FALSE"
+        row[21] = f"Shelf {idx % 40}"
+        rows.append(row)
+    return rows
+
+
+def build_legacy(rows: list[list[str]]) -> list[dict]:
+    """Previous get_all_items layout: one dict with 24 string keys per row."""
+    items = []
+    for idx, row in enumerate(rows):
+        if len(row) > INVENTORY_ID_COLUMN:
+            items.append({
+                "row_index": idx + 1,
+                "inventory_id": row[10],
+                "checkbox_t": row[19].upper() == "TRUE" if len(row) > 19 and row[19] else False,
+                "data": {
+                    column: row[position] if len(row) > position else ""
+                    for position, column in enumerate(COLUMN_LETTERS)
+                }
+            })
+    return items
+
+
+def build_compact(rows: list[list[str]]) -> list[ItemRow]:
+    """Current get_all_items layout."""
+    return [
+        ItemRow(idx + 1, tuple(row))
+        for idx, row in enumerate(rows)
+        if len(row) > INVENTORY_ID_COLUMN
+    ]
+
+
+def measure(name: str, builder, rows: list[list[str]]) -> None:
+    gc.collect()
+    started = time.perf_counter()
+    result = builder(rows)
+    elapsed = time.perf_counter() - started
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = builder(rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<10} rows={len(result):<7} build={elapsed * 1000:8.1f} ms  retained={current / 1024 / 1024:8.2f} MiB")
+    del result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"Synthetic ITEMS sheet: {args.rows} rows x {len(COLUMN_LETTERS)} columns")
+    print("Retained memory excludes the raw cell strings, which both layouts share.")
+    measure("legacy", build_legacy, rows)
+    measure("compact", build_compact, rows)
+
+
+if __name__ == "__main__":
+    main()
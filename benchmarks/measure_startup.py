@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Measure cold start: module import times and time to first HTTP response.
+
+Each import is timed in a fresh interpreter. Time to first response starts
+start_all.py in webhook mode (no Telegram connection needed) and polls
+/health and /items until they answer 200.
+
+Usage: python benchmarks/measure_startup.py [--repeat 3] [--backend memory]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ("app.main", "app.google_sheets", "app.bot")
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+
+
+def import_seconds(module: str, env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, process: subprocess.Popen, timeout: float) -> float | None:
+    """Poll url until it answers 200. Returns seconds since process start or None."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.poll() is None:
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                if response.status == 200:
+                    return time.monotonic()
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.01)
+    return None
+
+
+def time_to_first_response(env: dict, timeout: float) -> tuple[float | None, float | None]:
+    port = free_port()
+    env = {**env, "PORT": str(port), "TELEGRAM_WEBHOOK_SECRET": env.get("TELEGRAM_WEBHOOK_SECRET") or "startup-measure"}
+    started = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, "start_all.py"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        health = wait_for(f"http://127.0.0.1:{port}/health", process, timeout)
+        items = wait_for(f"http://127.0.0.1:{port}/items?limit=1", process, timeout)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return (
+        None if health is None else health - started,
+        None if items is None else items - started
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backend", default="memory", help="INVENTORY_BACKEND for the started server")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    env = {**os.environ, "INVENTORY_BACKEND": args.backend, "PYTHONDONTWRITEBYTECODE": "1"}
+    env.setdefault("TELEGRAM_BOT_TOKEN", "123456:STARTUP")
+
+    for module in MODULES:
+        samples = [import_seconds(module, env) for _ in range(args.repeat)]
+        print(f"import {module:<20} median {statistics.median(samples) * 1000:8.1f} ms")
+
+    health_samples, items_samples = [], []
+    for _ in range(args.repeat):
+        health, items = time_to_first_response(env, args.timeout)
+        if health is not None:
+            health_samples.append(health)
+        if items is not None:
+            items_samples.append(items)
+
+    for name, samples in (("/health", health_samples), ("/items", items_samples)):
+        if samples:
+            print(f"start -> first {name:<13} median {statistics.median(samples) * 1000:8.1f} ms")
+        else:
+            print(f"start -> first {name:<13} no response within {args.timeout:.0f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,41 @@
 #!/usr/bin/env python3
-"""Start script for Railway that runs both FastAPI server and Telegram bot."""
+"""Start script for Railway that runs both FastAPI server and Telegram bot.
+
+With TELEGRAM_WEBHOOK_SECRET set, the bot is served by webhook workers inside
+the FastAPI process and long polling is not started.
+"""
 import os
 import sys
 import asyncio
 import threading
+import time
 import uvicorn
 
+SERVER_READY_TIMEOUT = 60
+
+
+class ReadyServer(uvicorn.Server):
+    """uvicorn server that sets an event once lifespan startup is done and the port is bound."""
+    
+    def __init__(self, config: uvicorn.Config, ready: threading.Event):
+        super().__init__(config)
+        self.ready = ready
+    
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if self.started:
+            self.ready.set()
+
+
+def wait_for_server(ready: threading.Event, thread: threading.Thread, timeout: float) -> bool:
+    """Wait until server reports readiness. Returns False on timeout or if server thread exited."""
+    deadline = time.monotonic() + timeout
+    while not ready.wait(0.05):
+        if not thread.is_alive() or time.monotonic() > deadline:
+            return False
+    return True
+
+
 def get_port():
     """Get PORT from environment and validate it."""
     port_str = os.getenv("PORT", "8000")
@@ -22,17 +52,21 @@ def get_port():
         return 8000
 
 
-def run_fastapi(port: int):
-    """Run FastAPI server in a separate thread."""
+def run_fastapi(port: int, ready: threading.Event | None = None):
+    """Run FastAPI server. Sets ready, if given, once it accepts connections."""
     from app.main import app
     
     print(f"Starting FastAPI server on port {port}", file=sys.stderr)
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=port,
-        log_level="info"
+    server = ReadyServer(
+        uvicorn.Config(
+            app,
+            host="0.0.0.0",
+            port=port,
+            log_level="info"
+        ),
+        ready or threading.Event()
     )
+    server.run()
 
 
 async def run_bot():
@@ -46,17 +80,26 @@ async def run_bot():
 if __name__ == "__main__":
     port = get_port()
     
+    from app.config import config
+    
+    if config.is_webhook_mode():
+        run_fastapi(port)
+        sys.exit(0)
+    
     # Start FastAPI in a separate daemon thread
+    server_ready = threading.Event()
     fastapi_thread = threading.Thread(
         target=run_fastapi,
-        args=(port,),
+        args=(port, server_ready),
         daemon=True
     )
     fastapi_thread.start()
     
-    # Wait a moment for FastAPI to start
-    import time
-    time.sleep(2)
+    # Import the bot while FastAPI starts, then wait until the server is up
+    import app.bot
+    
+    if not wait_for_server(server_ready, fastapi_thread, SERVER_READY_TIMEOUT):
+        print("Warning: FastAPI server did not report readiness, starting bot anyway", file=sys.stderr)
     
     # Run bot in main thread
     try:
@@ -0,0 +1,15 @@
+import pytest
+
+from app.item_row import ItemRow
+from app.items_snapshot import ItemsSnapshot, rows_digest
+from app.memory_store import make_synthetic_rows
+
+
+@pytest.fixture
+def make_snapshot():
+    """Factory for snapshots of synthetic ITEMS rows: make_snapshot(count=5, version=1)."""
+    def make(count: int = 5, version: int = 1) -> ItemsSnapshot:
+        items = [ItemRow(idx + 1, tuple(row)) for idx, row in enumerate(make_synthetic_rows(count))]
+        return ItemsSnapshot(version, items, rows_digest(items))
+
+    return make
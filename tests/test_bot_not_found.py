@@ -0,0 +1,44 @@
+import asyncio
+
+from app import storage
+from app.bot import get_item_info
+from app.memory_store import InMemoryInventoryStore, make_synthetic_rows
+
+
+class FailingSearchStore(InMemoryInventoryStore):
+    async def search_items(self, query: str, limit: int):
+        raise RuntimeError("search index unavailable")
+
+
+def item_info(store: InMemoryInventoryStore, inventory_id: str, load_snapshot: bool = True):
+    async def main():
+        if load_snapshot:
+            await store.get_items_snapshot()
+        return await get_item_info(inventory_id)
+
+    return asyncio.run(main())
+
+
+def test_not_found_suggests_similar_items(monkeypatch):
+    store = InMemoryInventoryStore(make_synthetic_rows(20))
+    monkeypatch.setattr(storage, "inventory_store", store)
+
+    success, message, row_index = item_info(store, "Drill model")
+    assert not success and row_index is None
+    assert message.startswith("❌ Item not found: Drill model")
+    assert "Similar items" in message
+
+
+def test_failed_suggestion_lookup_keeps_not_found_reply(monkeypatch):
+    store = FailingSearchStore(make_synthetic_rows(20))
+    monkeypatch.setattr(storage, "inventory_store", store)
+
+    assert item_info(store, "Drill model") == (False, "❌ Item not found: Drill model", None)
+
+
+def test_not_found_does_not_load_full_sheet_for_suggestions(monkeypatch):
+    store = InMemoryInventoryStore(make_synthetic_rows(20))
+    monkeypatch.setattr(storage, "inventory_store", store)
+
+    assert item_info(store, "Drill model", load_snapshot=False) == (False, "❌ Item not found: Drill model", None)
+    assert store.calls["get_full"] == 0
@@ -0,0 +1,33 @@
+import asyncio
+
+from app import storage
+from app.bot import MAX_ID_LIST_CHARS, SUMMARY_TEXT_LIMIT, get_items_summary, join_ids
+from app.memory_store import InMemoryInventoryStore, make_synthetic_rows
+
+
+def test_summary_stays_under_telegram_limit(monkeypatch):
+    rows = make_synthetic_rows(60)
+    for row in rows:
+        row[1] = "Projector & screen kit <portable> " * 3
+        row[21] = "Warehouse 2, rack \"B\", shelf 14 " * 3
+    monkeypatch.setattr(storage, "inventory_store", InMemoryInventoryStore(rows))
+    found = [f"INV{row:06d}" for row in range(1, 61)]
+    missing = [f"MISSING-LABEL-{row:06d}" for row in range(1, 61)]
+
+    summary, found_rows = asyncio.run(get_items_summary(found + missing, duplicates=3))
+
+    assert len(summary) <= SUMMARY_TEXT_LIMIT
+    assert len(found_rows) == 60
+    assert "📦 <b>Found:</b> 60 of 120" in summary
+    assert "more" in summary
+    assert summary.endswith("🔁 <b>Duplicates skipped:</b> 3")
+
+
+def test_join_ids_counts_what_does_not_fit():
+    inventory_ids = [f"INV{row:06d}" for row in range(500)]
+    text = join_ids(inventory_ids, MAX_ID_LIST_CHARS)
+
+    assert len(text) <= MAX_ID_LIST_CHARS
+    shown = text.count("INV")
+    assert text.endswith(f"… and {len(inventory_ids) - shown} more")
+    assert join_ids(["A<1>", "B"], MAX_ID_LIST_CHARS) == "A&lt;1&gt;, B"
@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+
+from app import storage
+from app.item_row import CHECKBOX_COLUMN, INVENTORY_ID_COLUMN
+from app.main import app
+from app.memory_store import InMemoryInventoryStore, make_synthetic_rows
+
+
+def make_store(monkeypatch) -> InMemoryInventoryStore:
+    rows = make_synthetic_rows(10)
+    for row in rows:
+        row[CHECKBOX_COLUMN] = "FALSE"
+    store = InMemoryInventoryStore(rows)
+    monkeypatch.setattr(storage, "inventory_store", store)
+    return store
+
+
+def insert_top_row(store: InMemoryInventoryStore) -> None:
+    """Shift every row down by one, as if someone inserted a row above the data."""
+    row = list(store.rows[0])
+    row[INVENTORY_ID_COLUMN] = "INV999999"
+    row[CHECKBOX_COLUMN] = "FALSE"
+    store.rows.insert(0, row)
+
+
+def checked_ids(store: InMemoryInventoryStore) -> set[str]:
+    return {row[INVENTORY_ID_COLUMN] for row in store.rows if row[CHECKBOX_COLUMN] == "TRUE"}
+
+
+def post(store: InMemoryInventoryStore, path: str, body: dict) -> httpx.Response:
+    async def main():
+        await store.lookup_inventory_id("INV000001")
+        insert_top_row(store)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=body)
+
+    return asyncio.run(main())
+
+
+def test_check_confirms_cached_row(monkeypatch):
+    store = make_store(monkeypatch)
+    response = post(store, "/items/check", {"inventory_id": "INV000003"})
+
+    assert response.status_code == 200
+    assert checked_ids(store) == {"INV000003"}
+
+
+def test_batch_check_confirms_cached_rows(monkeypatch):
+    store = make_store(monkeypatch)
+    response = post(store, "/items/check/batch", {"inventory_ids": ["INV000003", "INV000007", " INV000003 "]})
+
+    assert response.status_code == 200
+    assert response.json()["updated"] == 2
+    assert [result["status"] for result in response.json()["results"]] == ["ok", "ok", "duplicate"]
+    assert checked_ids(store) == {"INV000003", "INV000007"}
+    assert store.calls["batchUpdate"] == 1
+
+
+def test_batch_check_reports_removed_ids_as_not_found(monkeypatch):
+    store = make_store(monkeypatch)
+
+    async def main():
+        await store.lookup_inventory_id("INV000001")
+        store.rows = [row for row in store.rows if row[INVENTORY_ID_COLUMN] != "INV000004"]
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/items/check/batch", json={"inventory_ids": ["INV000004", "INV000006"]})
+
+    response = asyncio.run(main())
+    assert [result["status"] for result in response.json()["results"]] == ["not_found", "ok"]
+    assert checked_ids(store) == {"INV000006"}
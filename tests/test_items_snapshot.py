@@ -0,0 +1,29 @@
+from app import items_snapshot
+from app.items_snapshot import version_etag
+
+
+def test_with_checkboxes_carries_inventory_id_map(make_snapshot):
+    snapshot = make_snapshot(10)
+    original = snapshot.find("INV000003")
+    patched = snapshot.with_checkboxes(2, {3: not original.checkbox_t})
+
+    assert patched._by_id is not None
+    assert patched.find("INV000003").checkbox_t is not original.checkbox_t
+    assert patched.find("INV000003") is patched.item_at(3)
+    assert patched.find("INV000004") is snapshot.find("INV000004")
+    assert snapshot.find("INV000003") is original
+
+
+def test_with_checkboxes_ignores_unknown_rows(make_snapshot):
+    snapshot = make_snapshot(5)
+    patched = snapshot.with_checkboxes(2, {99: True})
+
+    assert [item.cells for item in patched.items] == [item.cells for item in snapshot.items]
+
+
+def test_version_etag_differs_between_processes(monkeypatch):
+    first = version_etag("items", 1)
+    monkeypatch.setattr(items_snapshot, "ETAG_EPOCH", "restarted")
+
+    assert version_etag("items", 1) != first
+    assert version_etag("items", 1, "-ndjson") != version_etag("items", 1)
@@ -0,0 +1,141 @@
+import asyncio
+
+from app.item_row import CHECKBOX_COLUMN
+from app.journal import WriteJournal
+from app.memory_store import InMemoryInventoryStore, make_synthetic_rows
+from app.storage import BACKGROUND, request_priority
+
+
+class RejectedError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"{status_code}: rejected")
+        self.status_code = status_code
+
+
+class ReplayGateStore(InMemoryInventoryStore):
+    """Holds background (replay) writes until gate is set and rejects writes to rejected_rows."""
+
+    def __init__(self, rows: list[list[str]]) -> None:
+        super().__init__(rows)
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.replay_started = asyncio.Event()
+        self.rejected_rows: set[int] = set()
+
+    async def write_checkboxes(self, updates: dict[int, bool]) -> None:
+        if self.rejected_rows & updates.keys():
+            raise RejectedError(403)
+        if request_priority.get() == BACKGROUND:
+            self.replay_started.set()
+            await self.gate.wait()
+        await super().write_checkboxes(updates)
+
+
+def make_store(tmp_path) -> ReplayGateStore:
+    store = ReplayGateStore(make_synthetic_rows(10))
+    store.journal = WriteJournal(str(tmp_path / "journal.jsonl"))
+    return store
+
+
+def checkbox(store: InMemoryInventoryStore, row_index: int) -> str:
+    return store.rows[row_index - 1][CHECKBOX_COLUMN]
+
+
+def test_pending_skips_writes_in_flight(tmp_path):
+    async def scenario():
+        journal = WriteJournal(str(tmp_path / "journal.jsonl"))
+        seqs = await journal.record({3: True}, {3: "INV000003"})
+        assert journal.pending() == []
+        journal.release(seqs)
+        assert [record["seq"] for record in journal.pending()] == seqs
+        assert journal.claim(seqs[0], 3)
+        assert journal.pending() == []
+        assert not journal.claim(seqs[0], 3)
+
+    asyncio.run(scenario())
+
+
+def test_replay_does_not_overwrite_newer_write(tmp_path):
+    async def scenario():
+        store = make_store(tmp_path)
+        seqs = await store.journal.record({3: True}, {3: "INV000003"})
+        store.journal.release(seqs)
+
+        store.gate.clear()
+        replay = asyncio.create_task(store.replay_journal())
+        await store.replay_started.wait()
+        await store.update_checkbox(3, False, "INV000003")
+        assert checkbox(store, 3) == "FALSE"
+        store.gate.set()
+        assert await replay == 1
+
+        assert checkbox(store, 3) == "TRUE"
+        assert [record["value"] for record in store.journal.pending()] == [False]
+        assert await store.replay_journal() == 1
+        assert checkbox(store, 3) == "FALSE"
+        assert store.journal.pending() == []
+
+    asyncio.run(scenario())
+
+
+def test_rejected_record_is_retired(tmp_path):
+    async def scenario():
+        store = make_store(tmp_path)
+        store.rejected_rows = {2}
+        seqs = await store.journal.record({2: True, 4: True}, {2: "INV000002", 4: "INV000004"})
+        store.journal.release(seqs)
+
+        assert await store.replay_journal() == 1
+        assert checkbox(store, 4) == "TRUE"
+        assert store.journal.pending() == []
+        # Group commit: once this record is fsynced, the failed marker queued before it is too.
+        return await store.journal.record({5: True}, {})
+
+    barrier = asyncio.run(scenario())
+    assert [record["seq"] for record in WriteJournal(str(tmp_path / "journal.jsonl")).pending()] == barrier
+
+
+def test_compaction_keeps_pending_rows_and_sequence(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+
+    async def scenario():
+        journal = WriteJournal(path, compact_after=20)
+        stuck = await journal.record({1: True, 2: False}, {1: "INV000001", 2: "INV000002"})
+        journal.release(stuck)
+        for _ in range(30):
+            journal.mark_done(await journal.record({3: True}, {3: "INV000003"}))
+        barrier = await journal.record({4: True}, {4: "INV000004"})
+        return stuck, barrier
+
+    stuck, barrier = asyncio.run(scenario())
+    with open(path, encoding="utf-8") as file:
+        assert len(file.readlines()) < 20
+
+    reloaded = WriteJournal(path, compact_after=20)
+    assert [record["seq"] for record in reloaded.pending()] == stuck + barrier
+    assert [record["value"] for record in reloaded.pending()] == [True, False, True]
+
+    async def next_seq():
+        return await reloaded.record({5: True}, {})
+
+    assert asyncio.run(next_seq()) == [barrier[0] + 1]
+
+
+def test_oversized_journal_is_compacted_on_next_write(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+
+    async def fill():
+        journal = WriteJournal(path, compact_after=10_000)
+        for _ in range(50):
+            journal.mark_done(await journal.record({3: True}, {}))
+        return await journal.record({3: False}, {})
+
+    asyncio.run(fill())
+
+    async def write_once():
+        return await WriteJournal(path, compact_after=20).record({7: True}, {})
+
+    seqs = asyncio.run(write_once())
+    with open(path, encoding="utf-8") as file:
+        assert len(file.readlines()) == 3
+    assert [record["seq"] for record in WriteJournal(path).pending()] == [seqs[0] - 1, seqs[0]]
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+import httpx
+
+from app import storage
+from app.google_sheets import run_sheets_call
+from app.main import app
+from app.memory_store import InMemoryInventoryStore, make_synthetic_rows
+
+LATENCY = 0.3
+CONCURRENCY = 4
+
+
+class BlockingStore(InMemoryInventoryStore):
+    """Memory store whose row reads block like googleapiclient, run through the Sheets executor."""
+
+    def _blocking_row(self, row_index: int) -> list[str]:
+        time.sleep(LATENCY)
+        return list(self.rows[row_index - 1])
+
+    async def get_row_values(self, row_index: int, first_column: str = "A", last_column: str = "X") -> list[str]:
+        return await run_sheets_call(self._blocking_row, row_index)
+
+
+def test_run_sheets_call_overlaps_blocking_calls():
+    async def main():
+        started = time.perf_counter()
+        await asyncio.gather(*(run_sheets_call(time.sleep, LATENCY) for _ in range(CONCURRENCY)))
+        return time.perf_counter() - started
+
+    assert asyncio.run(main()) < LATENCY * 2
+
+
+def test_concurrent_item_requests_overlap(monkeypatch):
+    store = BlockingStore(make_synthetic_rows(CONCURRENCY))
+    monkeypatch.setattr(storage, "inventory_store", store)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await store.lookup_inventory_id("INV000001")
+            started = time.perf_counter()
+            slow = [client.get(f"/items/INV{row:06d}") for row in range(1, CONCURRENCY + 1)]
+            responses = await asyncio.gather(*slow, client.get("/health"))
+            return time.perf_counter() - started, responses
+
+    elapsed, responses = asyncio.run(main())
+    assert [response.status_code for response in responses] == [200] * (CONCURRENCY + 1)
+    assert elapsed < LATENCY * 2
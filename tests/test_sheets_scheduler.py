@@ -0,0 +1,158 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app import storage
+from app.main import app
+from app.memory_store import InMemoryInventoryStore, make_synthetic_rows
+from app.sheets_scheduler import SheetsScheduler, TokenBucket
+from app.storage import StoreBusyError, background_priority
+
+
+class HttpError(Exception):
+    """Stand-in for googleapiclient's HttpError: only status_code matters to the scheduler."""
+
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeCall:
+    """Raises the given errors in turn, then returns "ok". Counts attempts."""
+
+    def __init__(self, *errors: Exception) -> None:
+        self.errors = list(errors)
+        self.attempts = 0
+
+    async def __call__(self):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def make_scheduler(per_minute: float = 6000, max_wait: float = 0.5, max_retries: int = 3) -> SheetsScheduler:
+    return SheetsScheduler(
+        reads_per_minute=per_minute,
+        writes_per_minute=per_minute,
+        interactive_reserve=0.25,
+        max_wait=max_wait,
+        max_retries=max_retries,
+        backoff_base=0.001,
+        backoff_max=0.01
+    )
+
+
+def test_token_bucket_reserve_respects_floor():
+    bucket = TokenBucket(per_minute=4)
+    assert bucket.reserve(floor=2) == 0
+    assert bucket.reserve(floor=2) == 0
+    wait = bucket.reserve(floor=2)
+    assert wait == pytest.approx(15, rel=0.01)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() > 0
+
+
+def test_token_bucket_drain_empties_budget():
+    bucket = TokenBucket(per_minute=60)
+    bucket.drain()
+    assert bucket.reserve() == pytest.approx(1, rel=0.01)
+
+
+def test_interactive_call_is_shed_after_max_wait():
+    scheduler = make_scheduler(per_minute=60, max_wait=0.1)
+    call = FakeCall()
+
+    async def scenario():
+        for _ in range(60):
+            await scheduler.run("get", "read", call)
+        with pytest.raises(StoreBusyError) as error:
+            await scheduler.run("get", "read", call)
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert call.attempts == 60
+    assert error.retry_after == pytest.approx(1, abs=0.1)
+
+
+def test_background_calls_leave_interactive_reserve():
+    scheduler = make_scheduler(per_minute=4, max_wait=0.1)
+    bucket = scheduler._buckets["read"]
+    call = FakeCall()
+
+    async def scenario():
+        with background_priority():
+            for _ in range(3):
+                await scheduler.run("get", "read", call)
+        # A fourth background call would wait for a refill; interactive gets the reserved token now.
+        assert bucket.reserve(floor=bucket.capacity * 0.25) > 0
+        await scheduler.run("get", "read", call)
+
+    asyncio.run(scenario())
+    assert call.attempts == 4
+
+
+def test_retries_transient_statuses_then_succeeds():
+    scheduler = make_scheduler()
+    call = FakeCall(HttpError(503), HttpError(500), ConnectionError())
+
+    assert asyncio.run(scheduler.run("get", "read", call)) == "ok"
+    assert call.attempts == 4
+
+
+def test_429_drains_the_bucket():
+    scheduler = make_scheduler()
+    bucket = scheduler._buckets["read"]
+    call = FakeCall(HttpError(429))
+
+    assert asyncio.run(scheduler.run("get", "read", call)) == "ok"
+    assert call.attempts == 2
+    assert bucket._tokens < 1
+
+
+def test_last_transient_failure_becomes_store_busy():
+    scheduler = make_scheduler(max_retries=2)
+    call = FakeCall(*(HttpError(503) for _ in range(5)))
+
+    with pytest.raises(StoreBusyError) as error:
+        asyncio.run(scheduler.run("get", "read", call))
+    assert call.attempts == 3
+    assert isinstance(error.value.__cause__, HttpError)
+
+
+def test_client_errors_are_not_retried():
+    scheduler = make_scheduler()
+    call = FakeCall(HttpError(403))
+
+    with pytest.raises(HttpError):
+        asyncio.run(scheduler.run("get", "read", call))
+    assert call.attempts == 1
+
+
+class ScheduledStore(InMemoryInventoryStore):
+    """Memory store whose full reads go through a scheduler and always answer 503."""
+
+    def __init__(self, scheduler: SheetsScheduler) -> None:
+        super().__init__(make_synthetic_rows(5))
+        self.scheduler = scheduler
+        self.call = FakeCall(*(HttpError(503) for _ in range(10)))
+
+    async def fetch_rows(self) -> list[list[str]]:
+        return await self.scheduler.run("get_full", "read", self.call)
+
+
+def test_exhausted_retries_answer_503_with_retry_after(monkeypatch):
+    store = ScheduledStore(make_scheduler(max_retries=2))
+    monkeypatch.setattr(storage, "inventory_store", store)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/items")
+
+    response = asyncio.run(main())
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert store.call.attempts == 3
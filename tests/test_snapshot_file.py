@@ -0,0 +1,40 @@
+import time
+
+from app.snapshot_file import SnapshotFile
+
+
+def saved_version(snapshot_file: SnapshotFile, timeout: float = 2.0) -> int | None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        loaded = snapshot_file.load()
+        if loaded is not None:
+            return loaded[0]
+        time.sleep(0.01)
+    return None
+
+
+def test_throttled_saves_wait_for_interval(tmp_path, make_snapshot):
+    snapshot_file = SnapshotFile(str(tmp_path / "items.jsonl"), source="sheet", min_interval=60)
+    snapshot_file.save_later(make_snapshot(version=1))
+    assert saved_version(snapshot_file) == 1
+
+    snapshot_file.save_later(make_snapshot(version=2), throttle=True)
+    snapshot_file.save_later(make_snapshot(version=3), throttle=True)
+    time.sleep(0.2)
+    assert snapshot_file.load()[0] == 1
+
+    snapshot_file.flush()
+    assert snapshot_file.load()[0] == 3
+
+
+def test_unthrottled_save_is_not_held_back(tmp_path, make_snapshot):
+    snapshot_file = SnapshotFile(str(tmp_path / "items.jsonl"), source="sheet", min_interval=60)
+    snapshot_file.save_later(make_snapshot(version=1))
+    assert saved_version(snapshot_file) == 1
+
+    snapshot_file.save_later(make_snapshot(version=2), throttle=True)
+    snapshot_file.save_later(make_snapshot(version=3))
+    deadline = time.monotonic() + 2
+    while snapshot_file.load()[0] != 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert snapshot_file.load()[0] == 3
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.item_row import CHECKBOX_COLUMN
+from app.memory_store import InMemoryInventoryStore, make_synthetic_rows
+from app.storage import StoreUnavailableError, contiguous_row_ranges
+from app.write_queue import CheckboxWriteQueue
+
+WINDOW = 0.05
+
+
+class RecordingStore(InMemoryInventoryStore):
+    """Memory store that remembers every batch handed to write_checkboxes."""
+
+    def __init__(self, rows: list[list[str]]) -> None:
+        super().__init__(rows)
+        self.batches: list[dict[int, bool]] = []
+
+    async def write_checkboxes(self, updates: dict[int, bool]) -> None:
+        self.batches.append(dict(updates))
+        await super().write_checkboxes(updates)
+
+
+def make_queue() -> tuple[RecordingStore, CheckboxWriteQueue]:
+    store = RecordingStore(make_synthetic_rows(10))
+    return store, CheckboxWriteQueue(store.write_journaled, window=WINDOW, journal_func=store.journal_checkboxes)
+
+
+def test_repeated_toggles_merge_last_value_wins():
+    async def scenario():
+        store, queue = make_queue()
+        results = await asyncio.gather(
+            queue.submit(3, True),
+            queue.submit(3, False),
+            queue.submit(3, True),
+            queue.submit(5, False)
+        )
+        return store, results
+
+    store, results = asyncio.run(scenario())
+    assert results == [True] * 4
+    assert store.batches == [{3: True, 5: False}]
+    assert store.calls["batchUpdate"] == 1
+    assert store.rows[2][CHECKBOX_COLUMN] == "TRUE"
+    assert store.rows[4][CHECKBOX_COLUMN] == "FALSE"
+
+
+def test_failed_flush_fails_every_waiter():
+    async def scenario():
+        store, queue = make_queue()
+        store.error_rate = 1.0
+        return await asyncio.gather(
+            queue.submit(3, True),
+            queue.submit(3, False),
+            queue.submit(7, True),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert len(results) == 3
+    assert all(isinstance(result, StoreUnavailableError) for result in results)
+
+
+def test_flush_writes_right_away():
+    async def scenario():
+        store, queue = make_queue()
+        waiter = asyncio.ensure_future(queue.submit(2, True))
+        await asyncio.sleep(0)
+        await queue.flush()
+        assert store.batches == [{2: True}]
+        return await waiter
+
+    assert asyncio.run(scenario()) is True
+
+
+@pytest.mark.parametrize(("updates", "runs"), [
+    ({}, []),
+    ({4: True}, [(4, [True])]),
+    ({5: False, 3: True, 4: True}, [(3, [True, True, False])]),
+    ({1: True, 2: False, 4: True, 9: False, 10: True}, [(1, [True, False]), (4, [True]), (9, [False, True])]),
+])
+def test_contiguous_row_ranges(updates, runs):
+    assert contiguous_row_ranges(updates) == runs